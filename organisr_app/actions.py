@@ -1,72 +1,526 @@
+import os
+import sys
+import ctypes
+import ctypes.util
 import shutil
 import logging
+import threading
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, List, Optional
 import re
-from models import ActionPlan
+import errno
+from models import ActionPlan, FileContext
+from pipeline import defer
+from logger import file_events
+from hasher import DEFAULT_ALGORITHM, copy_and_hash, hash_file, report_progress
+from journal import MoveJournal
+from reports import ResultsSink
+from empty_dirs import EmptyDirTracker
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: reflinks are unavailable, hard links still work on NTFS
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# _IOW(0x94, 9, int) from <linux/fs.h>: share extents between files on btrfs/xfs
+FICLONE = 0x40049409
+
+# How confirmed duplicates are handled
+DEDUP_MODES = ('trash', 'hardlink', 'reflink')
+
+# Errors meaning "this kernel/filesystem pair can't do that copy call"; try the next one
+_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+# Bytes per in-kernel copy call; progress is reported between calls
+_COPY_CHUNK = 64 * 1024 * 1024
+
+# Free space kept in reserve on each destination device by the pre-flight check
+FREE_SPACE_MARGIN = 64 * 1024 * 1024
+
+class InsufficientSpaceError(OSError):
+    pass
+
+def _no_space(size: int, where: Path, free: int) -> InsufficientSpaceError:
+    return InsufficientSpaceError(
+        errno.ENOSPC,
+        f"Moving these files needs {size / 1024 / 1024:.0f} MB on the device holding "
+        f"{where}, but only {free / 1024 / 1024:.0f} MB is free"
+    )
+
+def _existing_ancestor(path: Path) -> Path:
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return path
+
+def cross_device_budget(source_dirs: List[Path], dest: Path) -> Dict[int, int]:
+    """
+    Space budget for sweeps, whose plans aren't known before they start: if any source
+    lives on another device than the destination, returns {destination device: free
+    bytes less FREE_SPACE_MARGIN} for ActionExecutor(space_budget=...), which charges
+    each cross-device copy to it so the run stops short of filling the disk.
+    Same-device sources are renamed, not copied, and need no budget.
+    """
+    existing = _existing_ancestor(Path(dest))
+    device = os.stat(existing).st_dev
+    if not any(os.path.isdir(p) and os.stat(p).st_dev != device for p in source_dirs):
+        return {}
+    # statvfs on POSIX, GetDiskFreeSpaceEx on Windows
+    return {device: shutil.disk_usage(existing).free - FREE_SPACE_MARGIN}
+
+# From <linux/fs.h> / <fcntl.h>
+RENAME_NOREPLACE = 1
+AT_FDCWD = -100
+
+def _load_renameat2():
+    """libc's renameat2 (glibc 2.28+), or None where it doesn't exist."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        fn = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    fn.restype = ctypes.c_int
+    return fn
+
+_renameat2 = _load_renameat2()
+
+def rename_noreplace(src: Path, dst: Path):
+    """
+    Renames src to dst, raising FileExistsError rather than replacing an existing dst.
+    Atomic through renameat2(RENAME_NOREPLACE) on Linux, and Windows' rename never
+    replaces; elsewhere an lexists() check narrows the race but can't close it.
+    """
+    if _renameat2 is not None:
+        if _renameat2(AT_FDCWD, os.fsencode(src), AT_FDCWD, os.fsencode(dst), RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        # ENOSYS: old kernel; EINVAL: the filesystem doesn't support the flag
+        if err not in (errno.ENOSYS, errno.EINVAL):
+            raise OSError(err, os.strerror(err), str(src), None, str(dst))
+    if os.name != 'nt' and os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst))
+    os.rename(src, dst)
+
+def _name_key(name: str) -> str:
+    # Windows and macOS filesystems are case-insensitive by default
+    return name.casefold() if sys.platform in ("win32", "darwin") else name
+
 class ActionExecutor:
-    def __init__(self, root_destination: Path, dry_run: bool = True):
+    def __init__(self, root_destination: Path, dry_run: bool = True, dedup_mode: str = 'trash', verify_copies: bool = False,
+                 journal: MoveJournal = None, sink: ResultsSink = None, empty_dirs: EmptyDirTracker = None,
+                 space_budget: Dict[int, int] = None):
+        if dedup_mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{dedup_mode}'. Expected one of: {', '.join(DEDUP_MODES)}")
         self.root_destination = root_destination
         self.dry_run = dry_run
-        self.trash_dir = root_destination / ".trash" / datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        self.created_folders = set()
-        self.moved_files = []
+        self.dedup_mode = dedup_mode
+        # Cross-device moves always check the copy against a hash dedup already computed;
+        # with verify_copies they are checksummed even when no hash is known yet
+        self.verify_copies = verify_copies
+        # Write-ahead log of every move and created folder, for --resume and --undo
+        self.journal = journal
+        run_id = journal.run_id if journal else datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.trash_dir = root_destination / ".trash" / run_id
+        # Optional report sink; created folders are streamed to it rather than kept
+        self.sink = sink
+        self.folders_created = 0
+        # Optional: counts what is left in each source folder, to find the ones emptied
+        self.empty_dirs = empty_dirs
+        # Optional: bytes each destination device can still take from cross-device moves (check_source_space)
+        self.space_budget = dict(space_budget or {})
+        self._space_lock = threading.Lock()
+        # Final paths written this run, so a scan that reaches the destination doesn't pick them up again
+        self.placed_paths = set()
+        if journal:
+            # A resumed run must not pick up what the interrupted one already placed
+            self.placed_paths.update(Path(p) for p in journal.completed.values())
+        # Directory metadata cached for the run: resolved folders and target folders known to exist
+        self._resolved_dirs = {}
+        self._ready_dirs = set()
+        self._dir_devices = {}
+        # Target folder -> names present (seeded by one scandir), and next suffix to try per (folder, stem, ext)
+        self._names = {}
+        self._next_suffix = {}
+        # Metadata calls made, and ones the caches made unnecessary
+        self.fs_calls = Counter()
+        self.fs_calls_saved = Counter()
+        self._stats_lock = threading.Lock()
+        self.renamed = 0
+        self.copied = 0
 
-    def execute(self, plan: ActionPlan):
+    def execute(self, plan: ActionPlan) -> bool:
+        """Carries out (or simulates) a plan. Returns False if the move failed."""
+        # Per-file lines are sampled (see logger.FileEvents) and deferred so the sample follows file order
+        prefix = "[DRY-RUN]" if self.dry_run else "[EXECUTE]"
         if plan.action_type == 'SKIP':
-            logger.info(f"[SKIP] {plan.source} -> {plan.reason}")
-            return
+            defer(file_events, "skip", "[SKIP] %s -> %s", plan.source, plan.reason)
+            return True
 
+        if plan.action_type == 'LINK':
+            defer(file_events, "link", "%s LINK: '%s' -> '%s' (%s)", prefix, plan.source, plan.destination, plan.reason)
+            if self.dry_run or self._perform_link(plan.source, plan.destination):
+                return True
+            # Link not possible here (other device, unsupported filesystem): fall back to trash
+            plan.action_type = 'TRASH'
+
+        target_dir = self.target_dir(plan)
         if plan.action_type == 'TRASH':
-            target_dir = self.trash_dir
             target_path = target_dir / plan.source.name
         else:
             # MOVE
-            target_dir = plan.destination.parent
             target_path = plan.destination
 
-        # Logging
-        prefix = "[DRY-RUN]" if self.dry_run else "[EXECUTE]"
-        logger.info(f"{prefix} {plan.action_type}: '{plan.source}' -> '{target_path}' ({plan.reason})")
+        defer(file_events, plan.action_type.lower(), "%s %s: '%s' -> '%s' (%s)",
+              prefix, plan.action_type, plan.source, target_path, plan.reason)
 
         if not self.dry_run:
-            self._perform_move(plan.source, target_dir, target_path)
+            final_path = self._perform_move(plan, target_dir, target_path)
+            plan.final_path = final_path
+            return final_path is not None
+        return True
+
+    def target_dir(self, plan: ActionPlan) -> Path:
+        """Folder a plan writes into. Links share the trash folder, which they fall back to."""
+        if plan.action_type == 'MOVE':
+            return plan.destination.parent
+        if plan.action_type in ('TRASH', 'LINK'):
+            return self.trash_dir
+        return plan.source.parent
+
+    def execute_batch(self, plans: List[ActionPlan]) -> List[bool]:
+        """
+        Executes plans grouped by target folder: every missing folder is created in one
+        pass, then each folder's moves run back to back. Order within a folder is kept,
+        so collision names come out exactly as with execute(). Returns results in input order.
+        """
+        groups = {}
+        for i, plan in enumerate(plans):
+            groups.setdefault(self.target_dir(plan), []).append(i)
+
+        if not self.dry_run:
+            self.check_free_space(plans)
+            # Parents sort before their children, so each mkdir finds its parent in place
+            for target in sorted(groups, key=lambda d: (len(d.parts), str(d))):
+                if any(plans[i].action_type in ('MOVE', 'TRASH') for i in groups[target]):
+                    try:
+                        self._ensure_dir(target)
+                    except OSError as e:
+                        # Each move in the folder will report the failure
+                        logger.debug(f"Could not create {target}: {e}")
+
+        results = [False] * len(plans)
+        for indices in groups.values():
+            for i in indices:
+                results[i] = self.execute(plans[i])
+        return results
+
+    def check_free_space(self, plans: List[ActionPlan]):
+        """
+        Pre-flight: totals the bytes each destination device must absorb from other devices
+        and raises InsufficientSpaceError before anything is moved if one can't take them.
+        Same-device moves are renames and need no space.
+        """
+        needed = Counter()
+        probe = {}
+        for plan in plans:
+            if plan.action_type not in ('MOVE', 'TRASH') or not plan.size_bytes:
+                continue
+            existing = _existing_ancestor(self.target_dir(plan))
+            device = self._device_of(existing)
+            if plan.source_device and plan.source_device != device:
+                needed[device] += plan.size_bytes
+                probe[device] = existing
+
+        for device, size in needed.items():
+            # statvfs on POSIX, GetDiskFreeSpaceEx on Windows
+            free = shutil.disk_usage(probe[device]).free
+            if size + FREE_SPACE_MARGIN > free:
+                raise _no_space(size, probe[device], free)
+
+    def _charge_space(self, folder: Path, size: int) -> Optional[int]:
+        """Takes size bytes from the budget of folder's device; returns the device, or None if unbudgeted."""
+        if not self.space_budget:
+            return None
+        device = self._device_of(folder)
+        with self._space_lock:
+            if device not in self.space_budget:
+                return None
+            if size > self.space_budget[device]:
+                raise _no_space(size, folder, self.space_budget[device] + FREE_SPACE_MARGIN)
+            self.space_budget[device] -= size
+        return device
+
+    def _refund_space(self, device: Optional[int], size: int):
+        if device is not None:
+            with self._space_lock:
+                self.space_budget[device] += size
+
+    def _device_of(self, folder: Path) -> int:
+        key = str(folder)
+        device = self._dir_devices.get(key)
+        if device is None:
+            self._count("stat")
+            device = os.stat(folder).st_dev
+            self._dir_devices[key] = device
+        return device
+
+    def _count(self, call: str, saved: bool = False):
+        with self._stats_lock:
+            (self.fs_calls_saved if saved else self.fs_calls)[call] += 1
 
-    def _perform_move(self, source: Path, target_dir: Path, target_path: Path):
+    def _resolve(self, path: Path) -> Path:
+        """path.resolve() with the folder part cached; scanned files are never symlinks themselves."""
+        return self._resolve_dir(path.parent) / path.name
+
+    def _resolve_dir(self, folder: Path) -> Path:
+        """
+        Resolves a folder from its already resolved parent: one lstat per new folder
+        instead of one per path component, which matters on high-latency mounts.
+        """
+        key = str(folder)
+        resolved = self._resolved_dirs.get(key)
+        if resolved is not None:
+            self._count("resolve", saved=True)
+            return resolved
+        self._count("resolve")
+        # Roots, relative paths, symlinks and '..' take the full resolve; so does Windows,
+        # where junctions aren't reported by islink
+        if (os.name == 'nt' or folder.parent == folder or not folder.is_absolute()
+                or folder.name == ".." or os.path.islink(folder)):
+            resolved = folder.resolve()
+        else:
+            resolved = self._resolve_dir(folder.parent) / folder.name
+        self._resolved_dirs[key] = resolved
+        return resolved
+
+    def _ensure_dir(self, target_dir: Path):
+        key = str(target_dir)
+        if key in self._ready_dirs:
+            self._count("stat", saved=True)
+            return
+        self._count("stat")
+        if not target_dir.exists():
+            self._count("mkdir")
+            if self.journal:
+                # Every folder about to be created, so undo can remove the whole chain
+                missing = [target_dir]
+                while not missing[-1].parent.exists():
+                    missing.append(missing[-1].parent)
+                for folder in reversed(missing):
+                    self.journal.mkdir(folder)
+            target_dir.mkdir(parents=True, exist_ok=True)
+            with self._stats_lock:
+                self.folders_created += 1
+            if self.sink:
+                # Deferred under the pipeline so the report keeps file order
+                defer(self.sink.folder, "created", target_dir)
+        self._ready_dirs.add(key)
+
+    def syscall_report(self, files: int) -> str:
+        """One-line summary of folder metadata calls per file, with and without the caches."""
+        made = sum(self.fs_calls.values())
+        saved = sum(self.fs_calls_saved.values())
+        files = max(files, 1)
+        return (f"Folder metadata calls: {made} ({made / files:.2f} per file); "
+                f"caching saved {saved} ({(made + saved) / files:.2f} per file without it)")
+
+    def _perform_move(self, plan: ActionPlan, target_dir: Path, target_path: Path) -> Optional[Path]:
+        """Moves the file and returns where it ended up, or None on failure."""
+        source = plan.source
+        final_path = None
+        entry = None
         try:
-            if not target_dir.exists():
-                target_dir.mkdir(parents=True, exist_ok=True)
-                self.created_folders.add(str(target_dir))
+            self._ensure_dir(target_dir)
             
             final_path = self._resolve_collision(target_path)
             
-            shutil.move(str(source), str(final_path))
-            self.moved_files.append((str(source), str(final_path)))
+            # Recorded before the move so a concurrent scan can never see the file unclaimed
+            self.placed_paths.add(final_path)
+            if self.journal:
+                entry = self.journal.intend(plan.action_type, source, final_path)
+            source_device = plan.source_device or os.lstat(source).st_dev
+            if source_device == self._device_of(target_dir):
+                try:
+                    final_path = self._rename_claiming(source, final_path, target_path, plan, entry)
+                    self.renamed += 1
+                except OSError as e:
+                    # Same st_dev but still EXDEV (e.g. bind mounts): copy instead
+                    if e.errno != errno.EXDEV:
+                        raise
+                    final_path = self._move_across(plan, final_path, target_path, entry)
+            else:
+                final_path = self._move_across(plan, final_path, target_path, entry)
+            if entry is not None:
+                self.journal.done(entry, final_path)
+            if self.empty_dirs:
+                self.empty_dirs.moved(source, final_path)
+            return final_path
         except Exception as e:
+            if entry is not None:
+                self.journal.failed(entry)
+            if final_path is not None:
+                self.placed_paths.discard(final_path)
+                self._release_name(final_path)
+            # The folder may have been removed underneath us; check it again next time
+            self._ready_dirs.discard(str(target_dir))
             logger.error(f"Failed to move {source}: {e}")
+            return None
+
+    def _rename_claiming(self, src: Path, final_path: Path, target_path: Path,
+                         plan: ActionPlan = None, entry: int = None) -> Path:
+        """
+        Renames without ever replacing a file. If something else took the name since the
+        index was seeded, that name is marked taken and the next suffix is tried, with a
+        fresh journal intent so recovery never takes the other file for this one.
+        """
+        while True:
+            try:
+                rename_noreplace(src, final_path)
+                return final_path
+            except FileExistsError:
+                self.placed_paths.discard(final_path)
+                final_path = self._resolve_collision(target_path)
+                self.placed_paths.add(final_path)
+                if entry is not None:
+                    self.journal.intend(plan.action_type, plan.source, final_path, seq=entry)
+
+    def _move_across(self, plan: ActionPlan, final_path: Path, target_path: Path, entry: int = None) -> Path:
+        """
+        Copy-then-delete for a move between devices. The copy goes to a temporary name and
+        only replaces the target once complete (and verified), so an interrupted move
+        never leaves a truncated file behind and never loses the source.
+        """
+        source = plan.source
+        tmp = final_path.with_name(f".{final_path.name}.organisr-part")
+        checksum = plan.source_hash or self.verify_copies
+        size = plan.size_bytes or os.stat(source).st_size
+        charged = self._charge_space(final_path.parent, size)
+        try:
+            with open(source, 'rb', buffering=0) as src, open(tmp, 'wb', buffering=0) as dst:
+                if checksum:
+                    algorithm = plan.source_hash.partition(":")[0] if plan.source_hash else DEFAULT_ALGORITHM
+                    digest = copy_and_hash(src, dst, algorithm)
+                else:
+                    self._copy_fast(src, dst)
+            if plan.source_hash and digest != plan.source_hash:
+                raise OSError(f"checksum mismatch copying {source}; the file changed since it was hashed")
+            if checksum and not plan.source_hash and hash_file(tmp, algorithm=algorithm) != digest:
+                raise OSError(f"copy of {source} does not match the source")
+            shutil.copystat(source, tmp)
+            final_path = self._rename_claiming(tmp, final_path, target_path, plan, entry)
+        except BaseException:
+            self._refund_space(charged, size)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            raise
+        os.unlink(source)
+        self.copied += 1
+        return final_path
+
+    @staticmethod
+    def _copy_fast(src, dst):
+        """In-kernel copy: copy_file_range, then sendfile, then plain reads and writes."""
+        if hasattr(os, "copy_file_range"):
+            try:
+                while os.copy_file_range(src.fileno(), dst.fileno(), _COPY_CHUNK):
+                    report_progress()
+                return
+            except OSError as e:
+                if e.errno not in _COPY_UNSUPPORTED:
+                    raise
+        if hasattr(os, "sendfile"):
+            try:
+                # Both calls advance the file offsets, so this resumes where the last one stopped
+                while os.sendfile(dst.fileno(), src.fileno(), None, _COPY_CHUNK):
+                    report_progress()
+                return
+            except OSError as e:
+                if e.errno not in _COPY_UNSUPPORTED:
+                    raise
+        buf = memoryview(bytearray(1024 * 1024))
+        while n := src.readinto(buf):
+            written = 0
+            while written < n:
+                written += dst.write(buf[written:n])
+            report_progress()
+
+    def _perform_link(self, source: Path, original: Path) -> bool:
+        """
+        Replaces `source` with a hard link or reflink to `original`, reclaiming its space
+        without copying data. The swap goes through a temporary name and os.replace,
+        so the duplicate path is never missing.
+        """
+        tmp = source.with_name(f".{source.name}.organisr-link")
+        try:
+            if self.dedup_mode == 'reflink':
+                if fcntl is None:
+                    raise OSError("reflinks are not supported on this platform")
+                with open(original, 'rb') as src, open(tmp, 'wb') as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                # A reflink is an independent file, so it can keep the duplicate's metadata
+                shutil.copystat(source, tmp)
+            else:
+                os.link(original, tmp)
+            os.replace(tmp, source)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not {self.dedup_mode} {source} to {original}: {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return False
+
+    def _names_in(self, folder: Path) -> set:
+        key = str(folder)
+        names = self._names.get(key)
+        if names is None:
+            self._count("scandir")
+            try:
+                with os.scandir(folder) as it:
+                    names = {_name_key(entry.name) for entry in it}
+            except FileNotFoundError:
+                names = set()
+            self._names[key] = names
+        return names
 
     def _resolve_collision(self, target_path: Path) -> Path:
         """
         If file exists, append a counter: file.txt -> file_1.txt
+        Answers come from the folder's name index, so the 5,000th IMG_0001.jpg costs no
+        more than the first. The returned name is reserved until _release_name.
         """
-        if not target_path.exists():
+        names = self._names_in(target_path.parent)
+        name = target_path.name
+        if _name_key(name) not in names:
+            names.add(_name_key(name))
             return target_path
 
         stem = target_path.stem
         suffix = target_path.suffix
-        parent = target_path.parent
-        counter = 1
-
-        while True:
-            new_name = f"{stem}_{counter}{suffix}"
-            new_path = parent / new_name
-            if not new_path.exists():
-                return new_path
+        key = (str(target_path.parent), stem, suffix)
+        counter = self._next_suffix.get(key, 1)
+        while _name_key(f"{stem}_{counter}{suffix}") in names:
             counter += 1
-    
+        self._next_suffix[key] = counter + 1
+
+        new_name = f"{stem}_{counter}{suffix}"
+        names.add(_name_key(new_name))
+        return target_path.parent / new_name
+
+    def _release_name(self, path: Path):
+        """Frees a reserved name whose move failed."""
+        names = self._names.get(str(path.parent))
+        if names is not None and not os.path.lexists(path):
+            names.discard(_name_key(path.name))
+
     def _smart_rename(self, filename: str) -> str:
         """
         Renames file to a more suitable format for organization.
@@ -84,13 +538,41 @@ class ActionExecutor:
         
         return f"{stem}{suffix}"
 
-    def create_plan(self, source: Path, domain: str, theme: str, is_duplicate: bool) -> ActionPlan:
+    def create_plan(self, source: Path, domain: str, theme: str, is_duplicate: bool, duplicate_of: FileContext = None,
+                    backed_up_in: str = None, context: FileContext = None) -> ActionPlan:
+        plan = self._plan_action(source, domain, theme, is_duplicate, duplicate_of)
+        if context is not None:
+            plan.size_bytes = context.size_bytes
+            plan.source_device = context.device
+            # Only known when dedup had to hash the file; lets a cross-device move verify for free
+            plan.source_hash = context.file_hash
+        if backed_up_in:
+            # The action is unchanged; the reason records that a backup already holds this content
+            plan.reason = f"Backed up in {backed_up_in}; {plan.reason[0].lower()}{plan.reason[1:]}"
+        return plan
+
+    def _plan_action(self, source: Path, domain: str, theme: str, is_duplicate: bool, duplicate_of: FileContext = None) -> ActionPlan:
+        if is_duplicate and duplicate_of is not None and self.dedup_mode != 'trash':
+            if self._same_inode(source, duplicate_of):
+                return ActionPlan(
+                    source=source,
+                    destination=duplicate_of.path,
+                    action_type='SKIP',
+                    reason=f"Already a hard link to {duplicate_of.path}"
+                )
+            return ActionPlan(
+                source=source,
+                destination=duplicate_of.path,
+                action_type='LINK',
+                reason=f"Duplicate of {duplicate_of.path}, replaced with {self.dedup_mode}"
+            )
+
         if is_duplicate:
             return ActionPlan(
                 source=source,
                 destination=Path("TRASH"), # Placeholder, handled in execute
                 action_type='TRASH',
-                reason="Duplicate file detected"
+                reason=f"Duplicate of {duplicate_of.path}" if duplicate_of is not None else "Duplicate file detected"
             )
 
         # Apply smart renaming
@@ -100,7 +582,7 @@ class ActionExecutor:
         dest_path = self.root_destination / domain / theme / new_filename
         
         # Safety check: Don't move if source and dest are same
-        if source.resolve() == dest_path.resolve():
+        if self._resolve(source) == self._resolve(dest_path):
              return ActionPlan(
                 source=source,
                 destination=dest_path,
@@ -108,4 +590,12 @@ class ActionExecutor:
                 reason="File already in correct location"
             )
 
-        return ActionPlan(source=source, destination=dest_path, action_type='MOVE', reason=f"Organized into {domain}/{theme}")
\ No newline at end of file
+        return ActionPlan(source=source, destination=dest_path, action_type='MOVE', reason=f"Organized into {domain}/{theme}")
+
+    @staticmethod
+    def _same_inode(source: Path, original: FileContext) -> bool:
+        try:
+            st = os.stat(source)
+        except OSError:
+            return False
+        return (st.st_dev, st.st_ino) == (original.device, original.inode)
\ No newline at end of file
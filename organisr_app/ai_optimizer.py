@@ -2,9 +2,16 @@ from datetime import datetime, timedelta
 from collections import Counter
 from typing import List, Dict
 from models import FileContext
+from taxonomy import EXTENSION_GROUPS
+from near_duplicates import NearDuplicateIndex
+from reports import ResultsSink
 
 class AIOptimizer:
-    def __init__(self):
+    def __init__(self, near_duplicates: NearDuplicateIndex = None, sink: ResultsSink = None):
+        # Optional perceptual-hash stage for the Images group
+        self.near_duplicates = near_duplicates
+        # Optional report sink: flagged files are streamed to it, only counts and sizes stay here
+        self.sink = sink
         self.stats = {
             "total_size": 0,
             "file_count": 0,
@@ -12,10 +19,12 @@ class AIOptimizer:
             "keywords": Counter(),
         }
         self.proposals = {
-            "delete_old_installers": [],
-            "delete_temp_files": [],
+            "delete_old_installers": 0,
+            "delete_temp_files": 0,
+            "near_duplicate_images": 0,
             "suggested_folders": []
         }
+        self.proposal_bytes = Counter()
 
     def analyze(self, context: FileContext):
         """Analyzes a single file to update stats and check for optimization opportunities."""
@@ -31,19 +40,28 @@ class AIOptimizer:
         # Space Management Logic
         self._check_deletable(context)
 
+        if self.near_duplicates and context.extension.lower() in EXTENSION_GROUPS.get("Images", ()):
+            self.near_duplicates.add(context)
+
     def _check_deletable(self, context: FileContext):
         # 1. Old Installers (> 60 days)
         if context.extension.lower() in ['.exe', '.msi', '.dmg', '.pkg', '.iso']:
             try:
-                mtime = datetime.fromtimestamp(context.path.stat().st_mtime)
+                mtime = datetime.fromtimestamp(context.mtime)
                 if datetime.now() - mtime > timedelta(days=60):
-                    self.proposals["delete_old_installers"].append(context)
+                    self._propose("delete_old_installers", context)
             except OSError:
                 pass
 
         # 2. Temp Files
         if context.extension.lower() in ['.tmp', '.log', '.bak', '.chk', '.dmp']:
-             self.proposals["delete_temp_files"].append(context)
+             self._propose("delete_temp_files", context)
+
+    def _propose(self, kind: str, context: FileContext, group: int = None):
+        self.proposals[kind] += 1
+        self.proposal_bytes[kind] += context.size_bytes
+        if self.sink:
+            self.sink.proposal(kind, context, group)
 
     def infer_structure(self) -> List[str]:
         """
@@ -64,16 +82,30 @@ class AIOptimizer:
         saved_space = 0
         report = []
         
-        installers_size = sum(f.size_bytes for f in self.proposals["delete_old_installers"])
+        installers_size = self.proposal_bytes["delete_old_installers"]
         if installers_size > 0:
-            report.append(f"[Space] Found {len(self.proposals['delete_old_installers'])} old installers ({installers_size/1024/1024:.2f} MB) suitable for deletion.")
+            report.append(f"[Space] Found {self.proposals['delete_old_installers']} old installers ({installers_size/1024/1024:.2f} MB) suitable for deletion.")
             saved_space += installers_size
 
-        temp_size = sum(f.size_bytes for f in self.proposals["delete_temp_files"])
+        temp_size = self.proposal_bytes["delete_temp_files"]
         if temp_size > 0:
-            report.append(f"[Space] Found {len(self.proposals['delete_temp_files'])} temporary files ({temp_size/1024/1024:.2f} MB) suitable for deletion.")
+            report.append(f"[Space] Found {self.proposals['delete_temp_files']} temporary files ({temp_size/1024/1024:.2f} MB) suitable for deletion.")
             saved_space += temp_size
 
+        if self.near_duplicates:
+            groups = self.near_duplicates.groups()
+            if not self.proposals["near_duplicate_images"]:
+                # Recorded on the first report only
+                for i, g in enumerate(groups):
+                    for f in g:
+                        self._propose("near_duplicate_images", f, group=i)
+            if groups:
+                # Keep the largest copy of each group; the rest is what could be reclaimed
+                extra = sum(sum(f.size_bytes for f in g) - max(f.size_bytes for f in g) for g in groups)
+                report.append(f"[Images] Found {len(groups)} groups of visually similar images ({sum(len(g) for g in groups)} files, {extra/1024/1024:.2f} MB in extra copies) worth reviewing.")
+                for g in groups[:5]:
+                    report.append("    " + ", ".join(f.filename for f in g[:4]) + (" ..." if len(g) > 4 else ""))
+
         if saved_space == 0:
             report.append("[Space] No significant space saving opportunities found.")
         else:
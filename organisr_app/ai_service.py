@@ -15,6 +15,8 @@ class LocalIntelligenceEngine:
         # Parse user context keywords (e.g., "University, Thesis") to boost specific scores
         self.user_context = [w.lower().strip() for w in user_context.split(',') if w.strip()]
         self._build_knowledge_base()
+        # Token -> closest concept (or None); filenames repeat tokens, difflib is the slow part
+        self._fuzzy_matches = {}
 
     def is_active(self):
         return self.enabled
@@ -122,9 +124,8 @@ class LocalIntelligenceEngine:
                 
                 # B. Fuzzy match (Tricks for typos or variations)
                 # Check if token is 'close enough' to known concepts
-                matches = difflib.get_close_matches(token, self.concepts.keys(), n=1, cutoff=0.85)
-                if matches:
-                    match_key = matches[0]
+                match_key = self._closest_concept(token)
+                if match_key:
                     cat, subcat, weight = self.concepts[match_key]
                     # Penalty for fuzzy match
                     score = (weight * 0.85) + context_boost
@@ -164,6 +165,23 @@ class LocalIntelligenceEngine:
             logger.error(f"Local AI analysis failed: {e}")
             return None
 
+    # Bound on remembered tokens; trees full of random names would otherwise grow it forever
+    FUZZY_CACHE_SIZE = 100_000
+
+    def _closest_concept(self, token: str):
+        # One lookup, and the answer returned from a local: another classify thread may
+        # clear the cache between a membership test and a second read
+        try:
+            return self._fuzzy_matches[token]
+        except KeyError:
+            pass
+        if len(self._fuzzy_matches) >= self.FUZZY_CACHE_SIZE:
+            self._fuzzy_matches.clear()
+        matches = difflib.get_close_matches(token, self.concepts.keys(), n=1, cutoff=0.85)
+        match = matches[0] if matches else None
+        self._fuzzy_matches[token] = match
+        return match
+
     def _tokenize(self, text: str):
         """Splits text into meaningful semantic units."""
         # Replace separators with spaces
@@ -0,0 +1,348 @@
+import os
+import time
+import errno
+import random
+import asyncio
+import builtins
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Generator, Iterable, List
+from models import FileContext
+from scan_index import ScanIndex
+from scanner import FileScanner, _LookAhead
+from hasher import hash_file, set_progress_hook
+
+logger = logging.getLogger(__name__)
+
+# Errors a network filesystem returns for a blip rather than a real problem; worth retrying
+TRANSIENT_ERRNOS = {errno.EAGAIN, errno.EINTR, errno.EIO, errno.ETIMEDOUT, errno.EBUSY,
+                    errno.ECONNRESET, getattr(errno, "ESTALE", errno.EIO)}
+
+class IOTimeout(OSError):
+    """An operation outlived its timeout. Callers that handle OSError treat it as a failed read."""
+    pass
+
+class IOLimiter:
+    """
+    Runs blocking filesystem calls from an asyncio event loop on its own thread, at most
+    `concurrency` at a time. A call times out once it has gone `timeout` seconds without
+    progress: hashing and copying report each chunk (hasher.report_progress), so a big
+    file that keeps moving is never cut off, while a read stuck on a dead server is.
+    Reads that fail with a transient error are retried `retries` times with exponential
+    backoff; calls made with retry=False (moves: a failed rename may still land) are not.
+
+    A timed-out call's thread can't be interrupted and keeps running, so it is never
+    retried (that would only stack a second stuck read on the first) and the pool has
+    spare threads beyond `concurrency`; a few hung files don't starve everything else.
+    wait_idle() waits for the calls still running, timed out or not.
+    Synchronous code uses call()/submit(); coroutines await run().
+    """
+    def __init__(self, concurrency: int = 32, timeout: float = 30.0, retries: int = 2, backoff: float = 0.5):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(self.concurrency + self.concurrency // 4 + 1, thread_name_prefix="io")
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._thread = threading.Thread(target=self.loop.run_forever, name="io-loop", daemon=True)
+        self._thread.start()
+        # Per operation name: calls made, retries, timeouts and calls that finally failed
+        self.calls = Counter()
+        self.retried = Counter()
+        self.timeouts = Counter()
+        self.failures = Counter()
+        # Calls whose thread is still running, per operation name
+        self._running = Counter()
+        self._idle = threading.Condition()
+
+    async def run(self, op: str, fn: Callable, *args, retry: bool = True):
+        attempt = 0
+        while True:
+            self.calls[op] += 1
+            async with self._semaphore:
+                beat = [time.monotonic()]
+                future = self.loop.run_in_executor(self._pool, self._tracked, op, beat, fn, *args)
+                try:
+                    return await self._watch(future, beat)
+                except asyncio.TimeoutError:
+                    self.timeouts[op] += 1
+                    self.failures[op] += 1
+                    # Moves are passed their ActionPlan; name the file rather than the plan
+                    target = getattr(args[0], "source", args[0]) if args else None
+                    raise IOTimeout(errno.ETIMEDOUT, f"{op} made no progress for {self.timeout:g}s", None if target is None else str(target))
+                except OSError as e:
+                    if e.errno not in TRANSIENT_ERRNOS:
+                        raise
+                    error = e
+            if not retry or attempt >= self.retries:
+                self.failures[op] += 1
+                raise error
+            attempt += 1
+            self.retried[op] += 1
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+    async def _watch(self, future: asyncio.Future, beat: list):
+        """Waits for future, raising TimeoutError once beat[0] is `timeout` seconds old."""
+        while True:
+            remaining = beat[0] + self.timeout - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            done, _ = await asyncio.wait({future}, timeout=remaining)
+            if done:
+                return future.result()
+
+    def _tracked(self, op: str, beat: list, fn: Callable, *args):
+        # Runs on a pool thread: progress reports refresh beat, and wait_idle() sees the call
+        with self._idle:
+            self._running[op] += 1
+        set_progress_hook(lambda: beat.__setitem__(0, time.monotonic()))
+        try:
+            return fn(*args)
+        finally:
+            set_progress_hook(None)
+            with self._idle:
+                self._running[op] -= 1
+                self._idle.notify_all()
+
+    def wait_idle(self, op: str):
+        """Blocks until no `op` call is running, including ones that timed out and still hang."""
+        with self._idle:
+            waited = 0.0
+            while self._running[op]:
+                if not self._idle.wait(self.timeout) and self._running[op]:
+                    waited += self.timeout
+                    logger.warning(f"Still waiting for {self._running[op]} {op} call(s) after {waited:g}s...")
+
+    def submit(self, op: str, fn: Callable, *args, retry: bool = True) -> Future:
+        """Schedules fn(*args) from any thread; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(self.run(op, fn, *args, retry=retry), self.loop)
+
+    def call(self, op: str, fn: Callable, *args, retry: bool = True):
+        """Blocking form of submit() for synchronous code."""
+        return self.submit(op, fn, *args, retry=retry).result()
+
+    def report(self) -> str:
+        def ops(counter):
+            return ", ".join(f"{op} {n}" for op, n in sorted(counter.items())) or "none"
+        return (f"I/O limiter: {sum(self.calls.values())} calls ({ops(self.calls)}); retries: {ops(self.retried)}; "
+                f"timeouts: {ops(self.timeouts)}; gave up: {ops(self.failures)}")
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        # Don't wait for calls that hung past their timeout
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class LimitedHasher:
+    """HashingService stand-in for the deduplicator that hashes through an IOLimiter."""
+    def __init__(self, limiter: IOLimiter, algorithm: str):
+        self.limiter = limiter
+        self.algorithm = algorithm
+
+    def submit(self, path: Path, size: int) -> Future:
+        return self.limiter.submit("hash", hash_file, path, size, self.algorithm)
+
+    def submit_batch(self, files: Iterable[tuple[Path, int]]) -> list[Future]:
+        return [self.submit(path, size) for path, size in files]
+
+    def shutdown(self):
+        pass
+
+class AsyncScanner(FileScanner):
+    """
+    FileScanner whose directory listings run as coroutines through an IOLimiter:
+    with 50 ms per metadata call, hundreds of folders are listed at once instead of
+    one after another. Yields in completion order, or depth-first with ordered=True.
+    A folder that keeps timing out is skipped with a warning.
+    """
+    def __init__(self, root_paths: list[Path], limiter: IOLimiter, ordered: bool = False, index: ScanIndex = None,
+                 listed: Callable[[str, int, List[str]], None] = None):
+        super().__init__(root_paths, workers=limiter.concurrency, ordered=ordered, index=index, listed=listed)
+        self.limiter = limiter
+        self.skipped_dirs = 0
+
+    def scan(self) -> Generator[FileContext, None, None]:
+        roots = [str(p) for p in self.root_paths if p.exists()]
+        if not roots:
+            return
+        ahead = _LookAhead() if self.ordered else None
+        listings = asyncio.run_coroutine_threadsafe(self._start(roots, ahead), self.limiter.loop).result()
+        walk = listings.walk
+        try:
+            if self.ordered:
+                yield from self._merge_ordered(roots, listings, ahead)
+            else:
+                while (item := listings.get()) is not None:
+                    yield from item[1]
+        finally:
+            # Also reached when the consumer abandons the generator early
+            self.limiter.loop.call_soon_threadsafe(walk.cancel)
+
+    async def _start(self, roots: List[str], ahead: _LookAhead = None) -> "_Listings":
+        listings = _Listings(self.limiter.loop, asyncio.Queue(self.limiter.concurrency * 4))
+        listings.walk = asyncio.ensure_future(self._walk(roots, listings.queue, ahead))
+        return listings
+
+    async def _walk(self, roots: List[str], out: asyncio.Queue, ahead: _LookAhead = None):
+        todo = list(reversed(roots))
+        ready = asyncio.Event()
+        state = {"pending": len(roots)}
+        if ahead:
+            # The merge runs on the consumer's thread
+            ahead.wake = lambda: self.limiter.loop.call_soon_threadsafe(ready.set)
+
+        async def worker():
+            while True:
+                if ahead and ahead.throttled():
+                    dirpath = ahead.claim([todo])
+                else:
+                    dirpath = todo.pop() if todo else None
+                if dirpath is None:
+                    if state["pending"] == 0:
+                        return
+                    ready.clear()
+                    await ready.wait()
+                    continue
+                try:
+                    contexts, subdirs = await self.limiter.run("list", self._list_dir, dirpath)
+                except OSError as e:
+                    with self._stats_lock:
+                        self.skipped_dirs += 1
+                    logger.warning(f"Skipping folder {dirpath}: {e}")
+                    contexts, subdirs = [], []
+                state["pending"] += len(subdirs)
+                # Reversed so the LIFO pop visits subdirectories in listing order
+                todo.extend(reversed(subdirs))
+                await out.put((dirpath, contexts, subdirs))
+                state["pending"] -= 1
+                ready.set()
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.limiter.concurrency)))
+        except Exception as e:
+            # End the listing rather than leave the consumer waiting forever
+            logger.error(f"Folder walk failed: {e}")
+        await out.put(None)
+
+class _Listings:
+    """Thread-side view of the walk's output queue, with the get() that _merge_ordered expects."""
+    def __init__(self, loop, q: asyncio.Queue):
+        self.loop = loop
+        self.queue = q
+        self.walk = None
+
+    def get(self):
+        return asyncio.run_coroutine_threadsafe(self.queue.get(), self.loop).result()
+
+class LatencyShim:
+    """
+    Benchmarking aid: makes a local tree behave like a network mount. While active,
+    filesystem calls on paths under `roots` sleep `latency` seconds first (+/- `jitter`
+    as a fraction), and calls on files named in `hang_names` stall for `hang_seconds`,
+    as a wedged NFS server would. Other paths (logs, ~/.organisr) are untouched.
+
+        with LatencyShim([tree], latency=0.02):
+            run_organizer_logic([tree], dest, ...)
+    """
+    _PATCHED = ("stat", "lstat", "scandir", "rename", "replace", "unlink", "mkdir", "rmdir", "link")
+
+    def __init__(self, roots: Iterable[Path], latency: float = 0.02, jitter: float = 0.0,
+                 hang_names: Iterable[str] = (), hang_seconds: float = 60.0):
+        self.roots = tuple(os.fsencode(os.path.abspath(r)) for r in roots)
+        self.latency = latency
+        self.jitter = jitter
+        self.hang_names = {os.fsencode(n) for n in hang_names}
+        self.hang_seconds = hang_seconds
+        self.delayed = Counter()
+        self._saved = {}
+
+    def _delay(self, op: str, path):
+        try:
+            p = os.fsencode(path)
+        except TypeError:
+            # File descriptors and other non-path arguments
+            return
+        if not p.startswith(self.roots):
+            return
+        self.delayed[op] += 1
+        if os.path.basename(p) in self.hang_names:
+            time.sleep(self.hang_seconds)
+        elif self.latency:
+            time.sleep(self.latency * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def _wrap(self, op: str, fn: Callable):
+        def delayed(path, *args, **kwargs):
+            self._delay(op, path)
+            return fn(path, *args, **kwargs)
+        return delayed
+
+    def __enter__(self):
+        import actions
+
+        for name in self._PATCHED:
+            self._saved[(os, name)] = getattr(os, name)
+            setattr(os, name, self._wrap(name, getattr(os, name)))
+        self._saved[(builtins, "open")] = builtins.open
+        builtins.open = self._wrap("open", builtins.open)
+
+        original_scandir = self._saved[(os, "scandir")]
+        def scandir(path=".", *args):
+            self._delay("scandir", path)
+            return _SlowScandir(original_scandir(path, *args), self)
+        os.scandir = scandir
+
+        if actions._renameat2 is not None:
+            renameat2 = actions._renameat2
+            self._saved[(actions, "_renameat2")] = renameat2
+            def slow_renameat2(src_fd, src, dst_fd, dst, flags):
+                self._delay("rename", src)
+                return renameat2(src_fd, src, dst_fd, dst, flags)
+            actions._renameat2 = slow_renameat2
+        return self
+
+    def __exit__(self, *exc):
+        for (module, name), fn in self._saved.items():
+            setattr(module, name, fn)
+        self._saved.clear()
+        return False
+
+class _SlowScandir:
+    """scandir iterator whose entries pay the shim's latency on stat(), like an NFS getattr."""
+    def __init__(self, it, shim: LatencyShim):
+        self._it = it
+        self._shim = shim
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _SlowEntry(next(self._it), self._shim)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._it.close()
+
+    def close(self):
+        self._it.close()
+
+class _SlowEntry:
+    def __init__(self, entry, shim: LatencyShim):
+        self._entry = entry
+        self._shim = shim
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+    def __fspath__(self):
+        return self._entry.path
+
+    def stat(self, *, follow_symlinks: bool = True):
+        self._shim._delay("stat", self._entry.path)
+        return self._entry.stat(follow_symlinks=follow_symlinks)
@@ -10,6 +10,59 @@ DEST_DIR = Path("C:/Users/roone/Documents/Organized")
 
 DRY_RUN = True
 LOG_FILE = Path("organizer.log")
+# The log file rolls over at this size, keeping LOG_BACKUPS old files
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+# Per-file messages (--verbose): the first of each kind, then one in this many
+LOG_SAMPLE_EVERY = 100
+
+# Directory traversal threads (1 = serial walk; raise for NVMe or network mounts)
+SCAN_WORKERS = 1
+# Ordered parallel scans: folders listed ahead of the depth-first cursor and held
+# until their turn; past this, walkers only list the folder the cursor waits on
+ORDERED_SCAN_LOOKAHEAD = 1024
+
+# Threads used to hash duplicate candidates (hashlib releases the GIL on large reads)
+HASH_WORKERS = 4
+
+# Digest used for deduplication: 'sha256', 'blake2b', 'blake2s' or 'xxh3_128' (needs xxhash)
+HASH_ALGORITHM = "sha256"
+
+# Duplicates: 'trash' moves them to .trash, 'hardlink'/'reflink' replace them in place with a link
+# to the original (reflink needs btrfs/xfs; hard-linked copies share edits)
+DEDUP_MODE = "trash"
+
+# Memory the dedup index may use before spilling to sorted runs in the temp directory
+DEDUP_MEMORY_MB = 256
+
+# Checksum every cross-device move, not just files whose hash dedup already computed
+VERIFY_COPIES = False
+
+# Pipelined runs (--pipeline): classification workers and move threads
+CLASSIFY_WORKERS = 2
+EXECUTE_WORKERS = 2
+# Files sent to a classification process per task (--classify-processes)
+CLASSIFY_CHUNK_SIZE = 64
+
+# Async I/O mode (--async-io) for network mounts: concurrent filesystem calls,
+# seconds without progress before one is abandoned, and retries for reads that hit a transient error
+IO_CONCURRENCY = 32
+IO_TIMEOUT = 30.0
+IO_RETRIES = 2
+
+# Progress events: at most one per PROGRESS_INTERVAL seconds. The up-front estimate of the
+# sources lists up to PROGRESS_SAMPLE_DIRS folders, then sends PROGRESS_SAMPLE_PROBES random
+# probes below them, within PROGRESS_SAMPLE_SECONDS
+PROGRESS_INTERVAL = 0.25
+PROGRESS_SAMPLE_DIRS = 2000
+PROGRESS_SAMPLE_PROBES = 500
+PROGRESS_SAMPLE_SECONDS = 2.0
+
+# Per-run reports (~/.organisr/reports/<run>/): 'jsonl' or 'csv'
+REPORT_FORMAT = "jsonl"
+
+# Parallel renames when undoing a run (--undo)
+UNDO_WORKERS = 8
 
 # Application Metadata
 APP_VERSION = "2.0.0"
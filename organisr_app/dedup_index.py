@@ -0,0 +1,263 @@
+import os
+import sys
+import math
+import mmap
+import shutil
+import struct
+import hashlib
+import tempfile
+from array import array
+from pathlib import Path
+from typing import List, Optional
+from models import FileContext
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# size, device, inode, mtime_ns, path length; the encoded path follows
+_RECORD = struct.Struct(">QQQqI")
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident memory of this process, where the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _key_hash(key: bytes) -> tuple[int, int]:
+    d = hashlib.blake2b(key, digest_size=16).digest()
+    # Odd second hash so double hashing visits distinct bits
+    return int.from_bytes(d[:8], 'big'), int.from_bytes(d[8:], 'big') | 1
+
+class BloomFilter:
+    """Fixed-size Bloom filter over pre-hashed keys (double hashing)."""
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def add(self, h1: int, h2: int):
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            self._array[bit >> 3] |= 1 << (bit & 7)
+        self.count += 1
+
+    def __contains__(self, hashes: tuple[int, int]) -> bool:
+        h1, h2 = hashes
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            if not self._array[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._array)
+
+class SpillableMultiMap:
+    """
+    Fixed-width key -> file id multimap kept as packed records (key + 8-byte id) in
+    bytearray buckets, behind a growing Bloom filter. spill() writes every bucket,
+    sorted, to an on-disk run that later lookups binary-search through mmap.
+    Ids come back in ascending order, i.e. earliest file first.
+    """
+    BUCKETS = 4096
+    INITIAL_CAPACITY = 1 << 20
+
+    def __init__(self, name: str, key_size: int):
+        self.name = name
+        self.key_size = key_size
+        self.record_size = key_size + 8
+        self._buckets = [bytearray() for _ in range(self.BUCKETS)]
+        self._blooms = [BloomFilter(self.INITIAL_CAPACITY)]
+        # (file, mmap, bucket start offsets in records)
+        self._runs = []
+        self.memory_bytes = 0
+
+    def add(self, key: bytes, file_id: int):
+        hashes = _key_hash(key)
+        bloom = self._blooms[-1]
+        if bloom.count >= bloom.capacity:
+            # Stack a bigger filter rather than rebuild: old keys stay in the old one
+            bloom = BloomFilter(bloom.capacity * 2)
+            self._blooms.append(bloom)
+        bloom.add(*hashes)
+        self._buckets[hashes[0] % self.BUCKETS] += key + file_id.to_bytes(8, 'big')
+        self.memory_bytes += self.record_size
+
+    def get(self, key: bytes) -> List[int]:
+        hashes = _key_hash(key)
+        if not any(hashes in bloom for bloom in self._blooms):
+            return []
+
+        bucket = hashes[0] % self.BUCKETS
+        ids = []
+        for _f, mm, starts in self._runs:
+            ids.extend(self._search_run(mm, starts[bucket], starts[bucket + 1], key))
+
+        buf = self._buckets[bucket]
+        rs, ks = self.record_size, self.key_size
+        pos = buf.find(key)
+        while pos != -1:
+            # A hit straddling two records is not a real match
+            if pos % rs == 0:
+                ids.append(int.from_bytes(buf[pos + ks:pos + rs], 'big'))
+            pos = buf.find(key, pos + 1)
+        return ids
+
+    def _search_run(self, mm, lo: int, hi: int, key: bytes) -> List[int]:
+        rs, ks = self.record_size, self.key_size
+        end = hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mm[mid * rs:mid * rs + ks] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        ids = []
+        while lo < end and mm[lo * rs:lo * rs + ks] == key:
+            ids.append(int.from_bytes(mm[lo * rs + ks:(lo + 1) * rs], 'big'))
+            lo += 1
+        return ids
+
+    def spill(self, spill_dir: Path):
+        if not self.memory_bytes:
+            return
+        rs = self.record_size
+        path = spill_dir / f"{self.name}-{len(self._runs)}.run"
+        starts = array('Q', [0])
+        written = 0
+        with open(path, 'wb') as f:
+            for i, buf in enumerate(self._buckets):
+                # Key then big-endian id: sorting the raw records keeps equal keys in id order
+                f.write(b"".join(sorted(buf[j:j + rs] for j in range(0, len(buf), rs))))
+                written += len(buf) // rs
+                starts.append(written)
+                self._buckets[i] = bytearray()
+        f = open(path, 'rb')
+        self._runs.append((f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), starts))
+        self.memory_bytes = 0
+
+    @property
+    def bloom_bytes(self) -> int:
+        return sum(b.nbytes for b in self._blooms)
+
+    def close(self):
+        for f, mm, _starts in self._runs:
+            mm.close()
+            f.close()
+        self._runs.clear()
+
+class FileTable:
+    """
+    Integer file id -> (path, size, device, inode, mtime_ns). Records are appended to an
+    anonymous temporary file; only an 8-byte offset per file stays in memory.
+    """
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="organisr-files-")
+        self._offsets = array('Q')
+        self._end = 0
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _append(self, context: FileContext) -> int:
+        encoded = os.fsencode(context.path)
+        self._file.seek(self._end)
+        self._file.write(_RECORD.pack(context.size_bytes, context.device, context.inode, context.mtime_ns, len(encoded)))
+        self._file.write(encoded)
+        offset = self._end
+        self._end += _RECORD.size + len(encoded)
+        return offset
+
+    def add(self, context: FileContext) -> int:
+        self._offsets.append(self._append(context))
+        return len(self._offsets) - 1
+
+    def update(self, file_id: int, context: FileContext):
+        """The file was moved; the stale record is simply left behind."""
+        self._offsets[file_id] = self._append(context)
+
+    def get(self, file_id: int) -> FileContext:
+        self._file.seek(self._offsets[file_id])
+        size, device, inode, mtime_ns, length = _RECORD.unpack(self._file.read(_RECORD.size))
+        p = Path(os.fsdecode(self._file.read(length)))
+        return FileContext(
+            path=p, filename=p.name, extension=p.suffix, parent_folder=p.parent.name,
+            size_bytes=size, mtime_ns=mtime_ns, inode=inode, device=device, file_id=file_id
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._offsets.itemsize * len(self._offsets)
+
+    def close(self):
+        self._file.close()
+
+class DedupIndex:
+    """
+    Everything the deduplicator remembers about a run, at a few dozen bytes per file:
+    file ids instead of Path objects, raw digest bytes instead of hex strings.
+    Once the multimaps hold more than `memory_limit` bytes they are spilled to sorted
+    runs in a temporary directory, so memory stays flat however large the tree is.
+    """
+    # Per-file flags
+    SAMPLED = 1
+    DIGESTED = 2
+
+    def __init__(self, digest_size: int, sample_key_bytes: int = 16, memory_limit: int = 256 * 1024 * 1024):
+        self.files = FileTable()
+        self.flags = bytearray()
+        self.inodes = SpillableMultiMap("inodes", 16)
+        # size -> first file of that size; later ones only enter the sample map
+        self.sizes = SpillableMultiMap("sizes", 8)
+        # size + leading sample digest bytes -> files
+        self.samples = SpillableMultiMap("samples", 8 + sample_key_bytes)
+        self.digests = SpillableMultiMap("digests", digest_size)
+        self.memory_limit = memory_limit
+        self.peak_bytes = 0
+        self.spills = 0
+        self._spill_dir: Optional[Path] = None
+
+    @property
+    def _maps(self):
+        return (self.inodes, self.sizes, self.samples, self.digests)
+
+    def add_file(self, context: FileContext) -> int:
+        context.file_id = self.files.add(context)
+        self.flags.append(0)
+        return context.file_id
+
+    def context_for(self, file_id: int) -> FileContext:
+        return self.files.get(file_id)
+
+    def relocate(self, context: FileContext):
+        if context.file_id >= 0:
+            self.files.update(context.file_id, context)
+
+    def memory_bytes(self) -> int:
+        return (self.files.memory_bytes + len(self.flags)
+                + sum(m.memory_bytes + m.bloom_bytes for m in self._maps))
+
+    def check_memory(self):
+        """Tracks the peak and spills the maps once their records pass the limit."""
+        self.peak_bytes = max(self.peak_bytes, self.memory_bytes())
+        if sum(m.memory_bytes for m in self._maps) < self.memory_limit:
+            return
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="organisr-dedup-"))
+        for m in self._maps:
+            m.spill(self._spill_dir)
+        self.spills += 1
+
+    def close(self):
+        for m in self._maps:
+            m.close()
+        self.files.close()
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
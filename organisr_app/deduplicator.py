@@ -1,27 +1,308 @@
+import struct
+from dataclasses import replace
 from pathlib import Path
-from typing import Dict
+from typing import Callable, List, Optional
 from models import FileContext
+from dedup_index import DedupIndex
+from manifest import HashManifest
 from scanner import FileScanner
+from hash_cache import HashCache
+from dest_index import DestinationIndex
+from hasher import HashingService, DEFAULT_ALGORITHM, new_hasher, format_digest
+
+_SIZE = struct.Struct(">Q")
+_INODE = struct.Struct(">QQ")
+
+def _same_file(a: FileContext, b: FileContext) -> bool:
+    """Same file by identity where both have one (Windows scandir reports inode 0), else by path."""
+    if a.inode and b.inode:
+        return (a.device, a.inode) == (b.device, b.inode)
+    return a.path == b.path
 
 class Deduplicator:
-    def __init__(self):
-        # Maps hash -> original file path
-        self.seen_hashes: Dict[str, Path] = {}
+    """
+    Staged duplicate detection: files are grouped by size first and only size
+    collisions are read. Within a collision group a cheap head/tail sample is
+    compared before the full content hash, so most files are never hashed at all.
+    Hard links to an already seen inode are caught before any of that, and the
+    destination index (when given) is consulted before the in-run groups.
+    Per-file state lives in a DedupIndex (integer ids, raw digest bytes), which
+    spills to disk past `memory_limit` bytes.
+    """
+    # Bytes read from each end of a file for the sample hash
+    SAMPLE_BYTES = 64 * 1024
+    # Leading bytes of the sample digest kept in the index; a full hash settles any tie
+    SAMPLE_KEY_BYTES = 16
+
+    def __init__(self, hash_cache: HashCache = None, hasher: HashingService = None, algorithm: str = DEFAULT_ALGORITHM,
+                 dest_index: DestinationIndex = None, memory_limit: int = 256 * 1024 * 1024,
+                 manifests: List[HashManifest] = None, io: Callable = None):
+        # Optional persistent cache so unchanged files are never re-read
+        self.hash_cache = hash_cache
+        # Optional thread pool used when several full hashes are needed at once
+        self.hasher = hasher
+        self.algorithm = hasher.algorithm if hasher else algorithm
+        self.index = DedupIndex(new_hasher(self.algorithm).digest_size, self.SAMPLE_KEY_BYTES, memory_limit)
+        # Optional index of the organised tree, so files already filed in earlier runs are caught
+        self.dest_index = dest_index
+        self.destination_matches = 0
+        # Optional external (backup) manifests; a file found in one is reported as backed up
+        self.manifests = manifests or []
+        self.manifest_matches = 0
+        # Set by the pipeline: wait_for_move(file_id) blocks until that file's queued move (if any)
+        # has landed and returns its new path, so earlier files are read where they are now
+        self.wait_for_move: Optional[Callable[[int], Optional[Path]]] = None
+        # Optional io(op, fn, *args) that file reads go through, e.g. async_io.IOLimiter.call
+        # for timeouts and retries on network mounts
+        self._io = io or (lambda _op, fn, *args: fn(*args))
+        self.bytes_read = 0
+        self.full_hashes = 0
 
     def is_duplicate(self, context: FileContext) -> bool:
+        """Checks if the file is a duplicate of a file seen earlier in this run."""
+        return self.find_duplicate(context) is not None
+
+    def find_duplicate(self, context: FileContext) -> Optional[FileContext]:
         """
-        Checks if the file is a duplicate based on content hash.
-        Calculates hash if not present in the context.
+        Returns the earlier file this one duplicates, or None.
+        Paths sharing an inode are matched without reading anything.
+        Empty files are never reported: they carry no content to deduplicate.
         """
+        if context.size_bytes == 0:
+            return None
+        try:
+            return self._find_duplicate(context)
+        finally:
+            self.index.check_memory()
+
+    def find_backup(self, context: FileContext) -> Optional[str]:
+        """
+        Name of the first manifest listing this file's content, or None.
+        Needs the full hash, so every file is read once while manifests are configured
+        (the hash cache keeps that to new or changed files).
+        """
+        if not self.manifests or context.size_bytes == 0:
+            return None
+        for manifest in self.manifests:
+            file_hash = self._hash_for(context, manifest.algorithm)
+            if file_hash and manifest.contains(file_hash, context.size_bytes):
+                self.manifest_matches += 1
+                return manifest.name
+        return None
+
+    def _hash_for(self, context: FileContext, algorithm: str) -> Optional[str]:
+        if algorithm == self.algorithm:
+            self._fill_full_hashes([context])
+            return context.file_hash
+        # A manifest written with another digest: hash again rather than mix algorithms
+        cached = self.hash_cache.get(context, algorithm) if self.hash_cache else None
+        if cached:
+            return cached
+        try:
+            file_hash = self._io("hash", FileScanner.calculate_hash, context.path, algorithm)
+        except OSError:
+            return None
+        self.bytes_read += context.size_bytes
+        if self.hash_cache:
+            self.hash_cache.put(context, file_hash, algorithm)
+        return file_hash
+
+    def _earlier(self, file_id: int) -> FileContext:
+        """Context of a file seen earlier in the run, at its current path."""
+        context = self.index.context_for(file_id)
+        if self.wait_for_move:
+            moved_to = self.wait_for_move(file_id)
+            if moved_to is not None:
+                context = replace(context, path=moved_to)
+        return context
+
+    def relocate(self, context: FileContext):
+        """Call after the file was moved, so later comparisons read it at its new path."""
+        self.index.relocate(context)
+
+    def close(self):
+        self.index.close()
+        for manifest in self.manifests:
+            manifest.close()
+
+    def _find_duplicate(self, context: FileContext) -> Optional[FileContext]:
+        index = self.index
+        file_id = index.add_file(context)
+
+        if context.inode:
+            inode_key = _INODE.pack(context.device, context.inode)
+            earlier = index.inodes.get(inode_key)
+            if earlier:
+                return self._earlier(earlier[0])
+            index.inodes.add(inode_key, file_id)
+
+        if self.dest_index is not None:
+            original = self._find_in_destination(context)
+            if original is not None:
+                self.destination_matches += 1
+                return original
+
+        size_key = _SIZE.pack(context.size_bytes)
+        first = index.sizes.get(size_key)
+        if not first:
+            # Unique size so far: cannot be a duplicate, nothing to read
+            index.sizes.add(size_key, file_id)
+            return None
+
+        try:
+            return self._find_in_group(context, first[0])
+        except OSError:
+            return None
+
+    def _find_in_destination(self, context: FileContext) -> Optional[FileContext]:
+        """Matches against files organised in earlier runs; one indexed size query in the common case."""
+        candidates = [
+            c for c in self.dest_index.candidates(context.size_bytes)
+            # The file itself may already live in the destination tree
+            if not _same_file(c, context)
+        ]
+        if not candidates:
+            return None
+
+        self._fill_full_hashes([context])
         if not context.file_hash:
-            # Calculate hash on demand using the Scanner's static method
+            return None
+
+        for candidate in candidates:
+            if not self.dest_index.is_current(candidate):
+                # Moved, edited or deleted by the user since it was indexed
+                self.dest_index.remove(candidate.path)
+                continue
+            if not candidate.file_hash or not candidate.file_hash.startswith(f"{self.algorithm}:"):
+                candidate.file_hash = None
+                self._fill_full_hashes([candidate])
+                if not candidate.file_hash:
+                    continue
+                self.dest_index.set_hash(candidate.path, candidate.file_hash)
+            if candidate.file_hash == context.file_hash:
+                return candidate
+        return None
+
+    def _find_in_group(self, context: FileContext, first_id: int) -> Optional[FileContext]:
+        index = self.index
+        # The first file of a size is only sampled once a second one turns up
+        self._register_sample(first_id)
+
+        sample_key = self._sample_key(context)
+        matches = index.samples.get(sample_key)
+        if matches:
+            self._register_digests(matches)
+            self._fill_full_hashes([context])
+            if context.file_hash:
+                found = index.digests.get(self._raw_digest(context.file_hash))
+                if found:
+                    return self._earlier(found[0])
+
+        index.samples.add(sample_key, context.file_id)
+        index.flags[context.file_id] |= DedupIndex.SAMPLED
+        if context.file_hash:
+            index.digests.add(self._raw_digest(context.file_hash), context.file_id)
+            index.flags[context.file_id] |= DedupIndex.DIGESTED
+        return None
+
+    def _register_sample(self, file_id: int):
+        index = self.index
+        if index.flags[file_id] & DedupIndex.SAMPLED:
+            return
+        index.flags[file_id] |= DedupIndex.SAMPLED
+        context = self._earlier(file_id)
+        try:
+            index.samples.add(self._sample_key(context), file_id)
+        except OSError:
+            # The earlier file vanished or became unreadable; it can't be a match
+            return
+        if context.file_hash:
+            index.digests.add(self._raw_digest(context.file_hash), file_id)
+            index.flags[file_id] |= DedupIndex.DIGESTED
+
+    def _register_digests(self, file_ids: List[int]):
+        index = self.index
+        pending = [i for i in file_ids if not index.flags[i] & DedupIndex.DIGESTED]
+        contexts = [self._earlier(i) for i in pending]
+        self._fill_full_hashes(contexts)
+        for c in contexts:
+            index.flags[c.file_id] |= DedupIndex.DIGESTED
+            if c.file_hash:
+                index.digests.add(self._raw_digest(c.file_hash), c.file_id)
+
+    @staticmethod
+    def _raw_digest(file_hash: str) -> bytes:
+        return bytes.fromhex(file_hash.partition(":")[2])
+
+    def _fill_full_hashes(self, contexts: List[FileContext]):
+        """Computes missing full hashes, in parallel when a hashing pool is available."""
+        missing = []
+        for c in contexts:
+            if c.file_hash:
+                continue
+            cached = self.hash_cache.get(c, self.algorithm) if self.hash_cache else None
+            if cached:
+                c.file_hash = cached
+            else:
+                missing.append(c)
+
+        if self.hasher and len(missing) > 1:
+            futures = self.hasher.submit_batch((c.path, c.size_bytes) for c in missing)
+            for c, future in zip(missing, futures):
+                try:
+                    self._store_hash(c, future.result())
+                except OSError:
+                    continue
+            return
+
+        for c in missing:
             try:
-                context.file_hash = FileScanner.calculate_hash(context.path)
+                self._store_hash(c, self._io("hash", FileScanner.calculate_hash, c.path, self.algorithm))
             except OSError:
-                return False
+                continue
+
+    def _sample_key(self, context: FileContext) -> bytes:
+        size = context.size_bytes
+        if size <= self.SAMPLE_BYTES * 2:
+            # Small files: the sample would be the whole file anyway
+            digest = self._full_hash(context)
+        else:
+            digest = self.hash_cache.get_sample(context, self.SAMPLE_BYTES, self.algorithm) if self.hash_cache else None
+            if not digest:
+                digest = self._io("sample", self._hash_sample, context.path)
+                self.bytes_read += self.SAMPLE_BYTES * 2
+                if self.hash_cache:
+                    self.hash_cache.put_sample(context, digest, self.SAMPLE_BYTES, self.algorithm)
+        return _SIZE.pack(size) + self._raw_digest(digest)[:self.SAMPLE_KEY_BYTES]
+
+    def _hash_sample(self, path: Path) -> str:
+        """Digest of the first and last SAMPLE_BYTES of a file."""
+        h = new_hasher(self.algorithm)
+        with open(path, 'rb') as f:
+            h.update(f.read(self.SAMPLE_BYTES))
+            f.seek(-self.SAMPLE_BYTES, 2)
+            h.update(f.read(self.SAMPLE_BYTES))
+        return format_digest(self.algorithm, h)
+
+    def _full_hash(self, context: FileContext) -> str:
+        if not context.file_hash:
+            context.file_hash = self._get_hash(context)
+        return context.file_hash
+
+    def _get_hash(self, context: FileContext) -> str:
+        if self.hash_cache:
+            cached = self.hash_cache.get(context, self.algorithm)
+            if cached:
+                return cached
+
+        # Calculate hash on demand using the Scanner's static method
+        file_hash = self._io("hash", FileScanner.calculate_hash, context.path, self.algorithm)
+        self._store_hash(context, file_hash)
+        return file_hash
 
-        if context.file_hash in self.seen_hashes:
-            return True
-        
-        self.seen_hashes[context.file_hash] = context.path
-        return False
\ No newline at end of file
+    def _store_hash(self, context: FileContext, file_hash: str):
+        context.file_hash = file_hash
+        self.bytes_read += context.size_bytes
+        self.full_hashes += 1
+        if self.hash_cache:
+            self.hash_cache.put(context, file_hash, self.algorithm)
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+from pathlib import Path
+from typing import List
+from models import FileContext
+from scanner import FileScanner
+
+DEST_INDEX_PATH = Path.home() / ".organisr" / "dest_index.db"
+
+class DestinationIndex:
+    """
+    Persistent content index of the organised (destination) tree.
+    Rows are looked up by size first; the digest is filled in lazily the first time
+    a same-sized file arrives, so most new files are cleared with one indexed query.
+    """
+    BATCH_SIZE = 1000
+
+    def __init__(self, root: Path, db_path: Path = DEST_INDEX_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.root = str(root)
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS organised (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                file_hash TEXT
+            );
+            CREATE INDEX IF NOT EXISTS organised_size ON organised(root, size);
+        """)
+        self._pending = []
+        self._pending_removes = []
+
+    def is_empty(self) -> bool:
+        row = self._conn.execute("SELECT 1 FROM organised WHERE root = ? LIMIT 1", (self.root,)).fetchone()
+        return row is None
+
+    def sync(self) -> int:
+        """
+        Indexes files already in the destination tree (stat only, nothing is read).
+        Only needed once, when the index is first used for this destination.
+        """
+        root = Path(self.root)
+        if not root.exists():
+            return 0
+        count = 0
+        for context in FileScanner([root]).scan():
+            self.add(context)
+            count += 1
+        self.flush()
+        return count
+
+    def candidates(self, size: int) -> List[FileContext]:
+        """
+        Organised files of exactly this size. Additions still buffered from this run are
+        not included; those files are already covered by the in-run size groups.
+        """
+        rows = self._conn.execute(
+            "SELECT path, size, mtime_ns, inode, device, file_hash FROM organised WHERE root = ? AND size = ?",
+            (self.root, size)
+        ).fetchall()
+        contexts = []
+        for path, size, mtime_ns, inode, device, file_hash in rows:
+            p = Path(path)
+            contexts.append(FileContext(
+                path=p, filename=p.name, extension=p.suffix, parent_folder=p.parent.name,
+                file_hash=file_hash, size_bytes=size, mtime_ns=mtime_ns, inode=inode, device=device
+            ))
+        return contexts
+
+    def add(self, context: FileContext):
+        """Records a file that now lives in the destination tree."""
+        inode, device = context.inode, context.device
+        if not inode:
+            # Windows scandir reports no file identity; os.stat does
+            try:
+                st = os.stat(context.path)
+                inode, device = st.st_ino, st.st_dev
+            except OSError:
+                pass
+        self._pending.append((
+            str(context.path), self.root, context.size_bytes, context.mtime_ns,
+            inode, device, context.file_hash
+        ))
+        if len(self._pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def set_hash(self, path: Path, file_hash: str):
+        with self._conn:
+            self._conn.execute("UPDATE organised SET file_hash = ? WHERE path = ?", (file_hash, str(path)))
+
+    def remove(self, path: Path):
+        key = str(path)
+        self._pending = [row for row in self._pending if row[0] != key]
+        self._pending_removes.append((key,))
+        if len(self._pending_removes) >= self.BATCH_SIZE:
+            self.flush()
+
+    def contains_path(self, path: Path) -> bool:
+        """Cheap prefix test: is this path inside the indexed destination tree?"""
+        p = str(path)
+        return p.startswith(self.root + os.sep)
+
+    @staticmethod
+    def is_current(context: FileContext) -> bool:
+        """True if the indexed file is still on disk unchanged (the user may have moved or edited it)."""
+        try:
+            st = os.stat(context.path)
+        except OSError:
+            return False
+        if (st.st_size, st.st_mtime_ns) != (context.size_bytes, context.mtime_ns):
+            return False
+        # Rows without a known identity are judged on size and mtime alone
+        return not context.inode or st.st_ino == context.inode
+
+    def flush(self):
+        with self._conn:
+            self._conn.executemany("DELETE FROM organised WHERE path = ?", self._pending_removes)
+            self._conn.executemany("INSERT OR REPLACE INTO organised VALUES (?, ?, ?, ?, ?, ?, ?)", self._pending)
+        self._pending_removes.clear()
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
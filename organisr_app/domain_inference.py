@@ -1,3 +1,6 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import List
 from models import FileContext
 from taxonomy import EXTENSION_GROUPS, CATEGORY_HIERARCHY, SCORE_EXACT, SCORE_PARTIAL, CONFIDENCE_THRESHOLD
 from ai_service import LocalIntelligenceEngine
@@ -5,6 +8,17 @@ from ai_service import LocalIntelligenceEngine
 class DomainInference:
     def __init__(self, ai_service: LocalIntelligenceEngine = None):
         self.ai_service = ai_service
+        # The taxonomy compiled once per run: lowercased keyword tuples and an extension lookup table
+        self._primary = {cat: tuple(kw.lower() for kw in v["keywords"]) for cat, v in CATEGORY_HIERARCHY.items()}
+        self._secondary = {
+            cat: {sub: tuple(kw.lower() for kw in kws) for sub, kws in v["subcategories"].items()}
+            for cat, v in CATEGORY_HIERARCHY.items()
+        }
+        self._ext_groups = {}
+        for group, extensions in EXTENSION_GROUPS.items():
+            for ext in extensions:
+                # First group listing an extension wins, as with the old linear search
+                self._ext_groups.setdefault(ext, group)
 
     def infer_domain_and_theme(self, context: FileContext):
         """
@@ -23,19 +37,15 @@ class DomainInference:
         ext_group = self._get_extension_group(context.extension)
         
         # 2. Level 2: Primary Category
-        primary_cat, primary_score, primary_reasons = self._get_best_match(
-            context.filename, 
-            {k: v["keywords"] for k, v in CATEGORY_HIERARCHY.items()}
-        )
+        primary_cat, primary_score, primary_reasons = self._get_best_match(context.filename, self._primary)
 
         if primary_score < CONFIDENCE_THRESHOLD:
             return ext_group, "Unsorted", primary_score, ["Low confidence in primary category"]
 
         # 3. Level 3: Secondary Subcategory
-        subcats = CATEGORY_HIERARCHY[primary_cat]["subcategories"]
         secondary_cat, secondary_score, secondary_reasons = self._get_best_match(
             context.filename,
-            subcats
+            self._secondary[primary_cat]
         )
 
         if secondary_score < CONFIDENCE_THRESHOLD:
@@ -48,11 +58,7 @@ class DomainInference:
         return ext_group, full_path, secondary_score, combined_reasons
 
     def _get_extension_group(self, extension: str) -> str:
-        ext = extension.lower()
-        for group, extensions in EXTENSION_GROUPS.items():
-            if ext in extensions:
-                return group
-        return "Unsorted_Extensions"
+        return self._ext_groups.get(extension.lower(), "Unsorted_Extensions")
 
     def _get_best_match(self, filename: str, candidates: dict) -> tuple:
         best_cat = None
@@ -67,7 +73,6 @@ class DomainInference:
             current_reasons = []
             
             for kw in keywords:
-                kw = kw.lower()
                 if kw in name_parts: # Exact word match
                     current_score += SCORE_EXACT
                     current_reasons.append(f"Matched keyword '{kw}'")
@@ -80,4 +85,39 @@ class DomainInference:
                 best_cat = cat
                 reasons = current_reasons
         
-        return best_cat, max_score, reasons
\ No newline at end of file
+        return best_cat, max_score, reasons
+
+# --- Process-pool classification ---
+
+# Each worker process builds its engine (knowledge base and compiled taxonomy) once, at start-up
+_worker_engine = None
+
+def _init_worker(user_context: str):
+    global _worker_engine
+    _worker_engine = DomainInference(ai_service=LocalIntelligenceEngine(user_context))
+
+def _classify_chunk(items: List[tuple]) -> List[tuple]:
+    results = []
+    for filename, extension in items:
+        # Classification only looks at the name, so a path-less context is enough
+        context = FileContext(path=Path(filename), filename=filename, extension=extension, parent_folder="")
+        group, path, score, _reasons = _worker_engine.infer_domain_and_theme(context)
+        # Reasons stay behind: only the compact result crosses the process boundary
+        results.append((group, path, score))
+    return results
+
+class ClassifierPool:
+    """
+    Runs DomainInference in worker processes, off the GIL. Work goes out in chunks of
+    (filename, extension) pairs and comes back as one list of (group, path, score)
+    tuples per chunk, so pickling costs are paid per chunk rather than per file.
+    """
+    def __init__(self, workers: int = 2, user_context: str = ""):
+        self._pool = ProcessPoolExecutor(max(1, workers), initializer=_init_worker, initargs=(user_context,))
+
+    def submit(self, contexts: List[FileContext]) -> Future:
+        """Classifies a chunk; the future's result lines up with `contexts`."""
+        return self._pool.submit(_classify_chunk, [(c.filename, c.extension) for c in contexts])
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -0,0 +1,134 @@
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class EmptyDirTracker:
+    """
+    Keeps a count of the entries still in every source folder the scanner listed, so
+    the folders a run emptied are known without walking the sources again afterwards.
+
+    The scanner reports each listing (listed), the executor each file it moves out
+    (moved). A folder whose count reaches zero stops counting against its parent, so a
+    chain of folders that held nothing but each other empties all the way up. Entries
+    the counts never saw (added during the run, or in folders an incremental scan
+    didn't list) only make a folder look fuller, never emptier.
+    """
+    def __init__(self, roots: Iterable[Path], dest: Path = None):
+        self.roots = {str(Path(r)) for r in roots}
+        self._remaining: Dict[str, int] = {}
+        self._parent: Dict[str, str] = {}
+        # Folders files left without a listing first (applying a plan); checked on disk at the end
+        self._unlisted: Set[str] = set()
+        # Only a destination inside a source can refill a folder that was emptied
+        self._refills = dest is not None and any(self._inside(str(Path(dest)), r) for r in self.roots)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _inside(path: str, root: str) -> bool:
+        return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+    def listed(self, dirpath: str, entries: int, subdirs: List[str]):
+        """A folder was listed: `entries` is everything in it, ignored names included."""
+        key = str(Path(dirpath))
+        with self._lock:
+            for sub in subdirs:
+                self._parent[str(Path(sub))] = key
+            self._remaining[key] = entries
+            if entries == 0:
+                self._emptied(key)
+
+    def moved(self, source: Path, destination: Path):
+        folder = str(source.parent)
+        with self._lock:
+            if folder in self._remaining:
+                self._remaining[folder] -= 1
+                if self._remaining[folder] == 0:
+                    self._emptied(folder)
+            else:
+                self._unlisted.add(folder)
+            if self._refills:
+                self._arrived(str(destination.parent))
+
+    def _emptied(self, folder: str):
+        parent = self._parent.get(folder)
+        while parent in self._remaining:
+            self._remaining[parent] -= 1
+            if self._remaining[parent] != 0:
+                return
+            parent = self._parent.get(parent)
+
+    def _arrived(self, folder: str):
+        # The nearest listed folder gains an entry (a folder created under it counts as one per file)
+        while folder not in self._remaining:
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                return
+            folder = parent
+        while folder in self._remaining:
+            self._remaining[folder] += 1
+            if self._remaining[folder] != 1:
+                return
+            # It had been counted as emptied in its parent
+            folder = self._parent.get(folder)
+
+    def empty_dirs(self) -> List[str]:
+        """Folders left empty (the source folders themselves excepted), deepest first."""
+        with self._lock:
+            empty = {d for d, n in self._remaining.items() if n == 0 and d not in self.roots}
+            unlisted = set(self._unlisted)
+        if unlisted:
+            self._check_unlisted(unlisted, empty)
+        return sorted(empty, key=lambda d: (-d.count(os.sep), d))
+
+    def _check_unlisted(self, folders: Set[str], empty: Set[str]):
+        """
+        Lists each folder a file left, deepest first, and its parent only if it emptied.
+        Folders nothing left are not looked at, so empty ones elsewhere aren't reported.
+        """
+        pending: Dict[int, Set[str]] = {}
+        for folder in folders:
+            pending.setdefault(folder.count(os.sep), set()).add(folder)
+        while pending:
+            for folder in pending.pop(max(pending)):
+                if folder in self.roots or not any(self._inside(folder, r) for r in self.roots):
+                    continue
+                if self._empty_tree(folder, empty):
+                    parent = os.path.dirname(folder)
+                    pending.setdefault(parent.count(os.sep), set()).add(parent)
+
+    def _empty_tree(self, folder: str, empty: Set[str]) -> bool:
+        """True (and recorded in `empty`) if folder holds nothing but folders that are empty too."""
+        if folder in empty:
+            return True
+        try:
+            with os.scandir(folder) as entries:
+                for e in entries:
+                    if e.is_symlink() or not e.is_dir() or not self._empty_tree(e.path, empty):
+                        return False
+        except OSError:
+            return False
+        empty.add(folder)
+        return True
+
+def prune_empty_dirs(folders: Iterable[str]) -> Tuple[int, int]:
+    """
+    Removes folders in one bottom-up pass: deepest first, so a parent whose children
+    were all removed goes in the same pass. rmdir refuses a folder that gained an
+    entry since it was reported, so a stale list is safe. Returns (removed, failed).
+    """
+    removed = failed = 0
+    for folder in sorted(set(folders), key=lambda d: str(d).count(os.sep), reverse=True):
+        try:
+            os.rmdir(folder)
+            removed += 1
+            logger.info(f"Deleted empty folder: {folder}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            failed += 1
+            logger.error(f"Failed to delete {folder}: {e}")
+    return removed, failed
@@ -1,6 +1,8 @@
+import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox, simpledialog
 import threading
+import multiprocessing
 import logging
 from pathlib import Path
 from queue import Queue
@@ -8,11 +10,15 @@ import time
 import json
 import shutil
 import webbrowser
+from itertools import islice
 
 # Import core logic
 import taxonomy
 from config import SOURCE_DIRS, DEST_DIR, APP_VERSION, THEME_MODE
-from main import run_organizer_logic
+from main import run_organizer_logic, apply_plan
+from plan_file import new_plan_path
+from reports import read_report
+from empty_dirs import prune_empty_dirs
 from updater import UpdateChecker
 from scheduler import schedule_weekly_task
 
@@ -323,19 +329,24 @@ class OrganizerGUI:
 
         self.run_btn.config(state='disabled')
         self.audit_btn.config(state='disabled')
+        # Indeterminate until the first progress event brings a total
+        self.progress.config(mode='indeterminate')
         self.progress.start(10)
         mode_text = "Auditing..." if audit_mode else "Running..."
         self.status_var.set(mode_text)
 
         # Run in separate thread to keep GUI responsive
-        thread = threading.Thread(target=self._run_logic, args=(source, dest, dry_run))
+        thread = threading.Thread(target=self._run_logic, args=(source, dest, dry_run, audit_mode))
         thread.daemon = True
         thread.start()
 
-    def _run_logic(self, source, dest, dry_run):
+    def _run_logic(self, source, dest, dry_run, audit_mode=False):
         try:
             user_context = self.user_context_var.get()
-            results = run_organizer_logic(source_dirs=[source], dest_dir=dest, dry_run=dry_run, user_context=user_context)
+            # A previewed plan is kept so it can be applied without scanning again
+            plan_path = new_plan_path() if dry_run and not audit_mode else None
+            results = run_organizer_logic(source_dirs=[source], dest_dir=dest, dry_run=dry_run, user_context=user_context,
+                                          plan_path=plan_path, progress=self._on_progress)
             
             count = results["count"]
             duration = results["duration"]
@@ -352,6 +363,20 @@ class OrganizerGUI:
             self.root.after(0, lambda: self.run_btn.config(state='normal'))
             self.root.after(0, lambda: self.audit_btn.config(state='normal'))
 
+    def _on_progress(self, event):
+        """Progress callback; runs on the worker thread, so the update is handed to Tk."""
+        self.root.after(0, lambda: self._show_progress(event))
+
+    def _show_progress(self, event):
+        if event.phase == 'counting':
+            self.status_var.set(event.describe())
+            return
+        if str(self.progress.cget('mode')) != 'determinate':
+            self.progress.stop()
+            self.progress.config(mode='determinate', maximum=100)
+        self.progress['value'] = event.fraction * 100
+        self.status_var.set(event.describe())
+
     def _on_finish(self, results, dry_run):
         """Handles post-processing popups."""
         # 1. Summary Popup
@@ -359,43 +384,75 @@ class OrganizerGUI:
             f"Organization Complete!\n\n"
             f"Files Processed: {results['count']}\n"
             f"Time Taken: {results['duration']:.2f}s\n"
-            f"Files Moved: {len(results['moved_files'])}\n"
-            f"New Folders Created: {len(results['created_folders'])}\n"
+            f"{'Files To Move' if dry_run else 'Files Moved'}: {results['moved']}\n"
+            f"New Folders Created: {results['created_folders']}\n"
         )
-        
+
         if results['created_folders']:
-            summary += "\nNew Folders:\n" + "\n".join([Path(p).name for p in results['created_folders'][:5]])
-            if len(results['created_folders']) > 5:
+            # Per-file details live in the run's reports; only the first few are read back
+            created = (r["path"] for r in read_report(results['reports']['folders']) if r["kind"] == "created")
+            summary += "\nNew Folders:\n" + "\n".join(Path(p).name for p in islice(created, 5))
+            if results['created_folders'] > 5:
                 summary += "\n...and more."
 
         messagebox.showinfo("Summary", summary)
 
-        # 2. Empty Folder Deletion (Only if not dry run)
+        # 2. Offer to carry out a previewed plan as-is
+        if dry_run and results.get('plan_path') and results['count']:
+            if messagebox.askyesno("Apply Plan", "Apply this preview now?\n\nFiles changed since the preview are left in place."):
+                self._start_apply(results['plan_path'])
+            return
+
+        # 3. Empty Folder Deletion (Only if not dry run)
         if not dry_run and results['empty_folders']:
-            count = len(results['empty_folders'])
+            count = results['empty_folders']
             msg = (
                 f"Found {count} empty folders in the source directory after organization.\n\n"
                 "Do you want to delete them to clean up?"
             )
             if messagebox.askyesno("Cleanup Empty Folders", msg):
-                self._delete_empty_folders(results['empty_folders'])
+                self._delete_empty_folders(
+                    r["path"] for r in read_report(results['reports']['folders']) if r["kind"] == "empty")
+
+    def _start_apply(self, plan_path):
+        self.run_btn.config(state='disabled')
+        self.audit_btn.config(state='disabled')
+        self.progress.config(mode='indeterminate')
+        self.progress.start(10)
+        self.status_var.set("Applying plan...")
+        thread = threading.Thread(target=self._apply_logic, args=(plan_path,))
+        thread.daemon = True
+        thread.start()
+
+    def _apply_logic(self, plan_path):
+        try:
+            results = apply_plan(plan_path, progress=self._on_progress)
+            msg = f"Completed! Applied {results['count'] - results['changed_sources']} planned actions in {results['duration']:.2f} seconds."
+            self.logger.info(msg)
+            self.root.after(0, lambda: self.status_var.set(msg))
+            self.root.after(0, lambda: self._on_finish(results, False))
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            self.root.after(0, lambda: self.status_var.set("Error occurred"))
+        finally:
+            self.root.after(0, self.progress.stop)
+            self.root.after(0, lambda: self.run_btn.config(state='normal'))
+            self.root.after(0, lambda: self.audit_btn.config(state='normal'))
 
     def _delete_empty_folders(self, folders):
-        deleted_count = 0
-        for folder in folders:
-            try:
-                # Double check it's still empty and exists
-                p = Path(folder)
-                if p.exists() and not any(p.iterdir()):
-                    p.rmdir()
-                    deleted_count += 1
-                    self.logger.info(f"Deleted empty folder: {folder}")
-            except Exception as e:
-                self.logger.error(f"Failed to delete {folder}: {e}")
-        
+        # One bottom-up pass: parents emptied by removing their children go too
+        deleted_count, _failed = prune_empty_dirs(folders)
         messagebox.showinfo("Cleanup Complete", f"Deleted {deleted_count} empty folders.")
 
 if __name__ == "__main__":
+    # Classification worker processes re-enter here in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        # Command-line run of the packaged exe (the weekly scheduled task): no window,
+        # progress and results go to the log file
+        from main import main as run_cli
+        run_cli()
+        sys.exit(0)
     root = tk.Tk()
     app = OrganizerGUI(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+from models import FileContext
+from hasher import DEFAULT_ALGORITHM
+
+CACHE_PATH = Path.home() / ".organisr" / "hash_cache.db"
+
+class HashCache:
+    """
+    Persistent content-hash cache keyed by (st_dev, st_ino, size, mtime_ns).
+    Keying on the inode rather than the path means a hash survives same-device moves,
+    so files filed away by a previous run are never read again while unchanged.
+    The algorithm is stored with each digest; switching algorithms simply misses.
+    Each entry can also hold the deduplicator's head+tail sample digest (with the
+    sample length it was taken over), so size collisions aren't re-sampled either;
+    an entry may hold either digest alone (file_hash is '' until a full hash is stored).
+
+    Scans on Windows leave the inode at 0, so it is taken from os.stat (the NTFS file
+    ID). Filesystems with no file IDs at all are keyed by path instead, under device
+    PATH_KEY; those entries follow a move through moved() rather than the inode.
+    """
+    BATCH_SIZE = 5000
+    PATH_KEY = -1
+    # Entries not seen by a scan for this long are re-checked against the disk and evicted if gone
+    STALE_AFTER_SECONDS = 7 * 24 * 3600
+
+    def __init__(self, db_path: Path = CACHE_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                file_hash TEXT NOT NULL,
+                path TEXT NOT NULL,
+                last_seen REAL NOT NULL,
+                algorithm TEXT NOT NULL DEFAULT 'sha256',
+                sample_hash TEXT,
+                sample_bytes INTEGER,
+                PRIMARY KEY (device, inode)
+            )
+        """)
+        self._migrate()
+        self._run_started = time.time()
+        self._pending_puts = []
+        self._pending_samples = []
+        self._pending_touches = []
+        self._pending_rekeys = []
+        self.hits = 0
+        self.misses = 0
+
+    def _migrate(self):
+        """
+        Caches written before digests were algorithm-tagged only held bare SHA-256 hex;
+        older ones also lack the sample columns.
+        """
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(hashes)")}
+        if "algorithm" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE hashes ADD COLUMN algorithm TEXT NOT NULL DEFAULT 'sha256'")
+                self._conn.execute("UPDATE hashes SET file_hash = 'sha256:' || file_hash")
+        if "sample_hash" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE hashes ADD COLUMN sample_hash TEXT")
+                self._conn.execute("ALTER TABLE hashes ADD COLUMN sample_bytes INTEGER")
+
+    @classmethod
+    def _path_key(cls, path) -> Tuple[int, int]:
+        digest = hashlib.blake2b(os.fsencode(str(path)), digest_size=8).digest()
+        return cls.PATH_KEY, int.from_bytes(digest, "big") >> 1
+
+    def _key(self, context: FileContext, path=None) -> Optional[Tuple[int, int]]:
+        """(device, inode) for the file at `path` (default context.path), or None if it can't be keyed."""
+        # Contexts built without stat data can't be matched against a later scan
+        if not context.mtime_ns:
+            return None
+        if context.inode:
+            return context.device, context.inode
+        try:
+            st = os.stat(path or context.path)
+        except OSError:
+            return None
+        if st.st_ino:
+            return st.st_dev, st.st_ino
+        return self._path_key(context.path)
+
+    def get(self, context: FileContext, algorithm: str = DEFAULT_ALGORITHM) -> Optional[str]:
+        return self._lookup(context, "file_hash != ''", "file_hash", algorithm)
+
+    def get_sample(self, context: FileContext, sample_bytes: int, algorithm: str = DEFAULT_ALGORITHM) -> Optional[str]:
+        """Sample digest over the first and last `sample_bytes` of the file, if cached."""
+        return self._lookup(context, "sample_bytes = ?", "sample_hash", algorithm, (sample_bytes,))
+
+    def _lookup(self, context: FileContext, condition: str, column: str, algorithm: str, params: tuple = ()) -> Optional[str]:
+        key = self._key(context)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {column} FROM hashes WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? "
+                f"AND algorithm = ? AND {condition}",
+                (*key, context.size_bytes, context.mtime_ns, algorithm, *params)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pending_touches.append((str(context.path), self._run_started, *key))
+        if len(self._pending_touches) >= self.BATCH_SIZE:
+            self.flush()
+        return row[0]
+
+    def put(self, context: FileContext, file_hash: str, algorithm: str = DEFAULT_ALGORITHM):
+        key = self._key(context)
+        if key is None:
+            return
+        with self._lock:
+            self._pending_puts.append((
+                *key, context.size_bytes, context.mtime_ns,
+                file_hash, str(context.path), self._run_started, algorithm
+            ))
+        if len(self._pending_puts) >= self.BATCH_SIZE:
+            self.flush()
+
+    def put_sample(self, context: FileContext, sample_hash: str, sample_bytes: int, algorithm: str = DEFAULT_ALGORITHM):
+        key = self._key(context)
+        if key is None:
+            return
+        with self._lock:
+            self._pending_samples.append((
+                *key, context.size_bytes, context.mtime_ns,
+                str(context.path), self._run_started, algorithm, sample_hash, sample_bytes
+            ))
+        if len(self._pending_samples) >= self.BATCH_SIZE:
+            self.flush()
+
+    def moved(self, context: FileContext, new_path: Path):
+        """
+        Points the entry of a file the run moved at its new path, so evict_missing finds
+        it there. A move across devices changes the inode; that entry goes stale as before.
+        """
+        # The old path is gone by now; a same-device move keeps the file ID, so stat the new one
+        key = self._key(context, new_path)
+        if key is None:
+            return
+        new_key = self._path_key(new_path) if key[0] == self.PATH_KEY else key
+        with self._lock:
+            self._pending_rekeys.append((*new_key, str(new_path), *key))
+        if len(self._pending_rekeys) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            with self._conn:
+                # Either digest keeps the other while the file's stat data and algorithm still match
+                self._conn.executemany("""
+                    INSERT INTO hashes (device, inode, size, mtime_ns, file_hash, path, last_seen, algorithm)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (device, inode) DO UPDATE SET
+                        sample_hash = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                            AND algorithm = excluded.algorithm THEN sample_hash END,
+                        sample_bytes = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                            AND algorithm = excluded.algorithm THEN sample_bytes END,
+                        size = excluded.size, mtime_ns = excluded.mtime_ns, file_hash = excluded.file_hash,
+                        path = excluded.path, last_seen = excluded.last_seen, algorithm = excluded.algorithm
+                """, self._pending_puts)
+                self._conn.executemany("""
+                    INSERT INTO hashes (device, inode, size, mtime_ns, file_hash, path, last_seen, algorithm, sample_hash, sample_bytes)
+                    VALUES (?, ?, ?, ?, '', ?, ?, ?, ?, ?)
+                    ON CONFLICT (device, inode) DO UPDATE SET
+                        file_hash = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                            AND algorithm = excluded.algorithm THEN file_hash ELSE '' END,
+                        size = excluded.size, mtime_ns = excluded.mtime_ns, sample_hash = excluded.sample_hash,
+                        sample_bytes = excluded.sample_bytes, path = excluded.path, last_seen = excluded.last_seen,
+                        algorithm = excluded.algorithm
+                """, self._pending_samples)
+                self._conn.executemany(
+                    "UPDATE hashes SET path = ?, last_seen = ? WHERE device = ? AND inode = ?", self._pending_touches
+                )
+                self._conn.executemany(
+                    "UPDATE OR REPLACE hashes SET device = ?, inode = ?, path = ? WHERE device = ? AND inode = ?",
+                    self._pending_rekeys
+                )
+            self._pending_puts.clear()
+            self._pending_samples.clear()
+            self._pending_touches.clear()
+            self._pending_rekeys.clear()
+
+    def evict_missing(self) -> int:
+        """
+        Drops entries whose file no longer exists (or whose inode was reused by another file).
+        Only entries unseen for STALE_AFTER_SECONDS are checked, so this stays cheap every run.
+        Returns the number of evicted entries.
+        """
+        cutoff = self._run_started - self.STALE_AFTER_SECONDS
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT device, inode, size, mtime_ns, path FROM hashes WHERE last_seen < ?", (cutoff,)
+            ).fetchall()
+
+        evicted = []
+        still_valid = []
+        for device, inode, size, mtime_ns, path in rows:
+            try:
+                st = os.lstat(path)
+                if device == self.PATH_KEY:
+                    current = (device, inode, st.st_size, st.st_mtime_ns)
+                else:
+                    current = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+                if current == (device, inode, size, mtime_ns):
+                    still_valid.append((self._run_started, device, inode))
+                    continue
+            except OSError:
+                pass
+            evicted.append((device, inode))
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM hashes WHERE device = ? AND inode = ?", evicted)
+                self._conn.executemany("UPDATE hashes SET last_seen = ? WHERE device = ? AND inode = ?", still_valid)
+        return len(evicted)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,154 @@
+import os
+import mmap
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import Iterable, Optional
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# name -> (constructor, cryptographic). Cryptographic digests are safe to trust for
+# deleting duplicates; non-cryptographic ones are faster but only guard against accidents.
+ALGORITHMS = {
+    "sha256": (hashlib.sha256, True),
+    "blake2b": (hashlib.blake2b, True),
+    "blake2s": (hashlib.blake2s, True),
+}
+if xxhash is not None:
+    ALGORITHMS["xxh3_128"] = (xxhash.xxh3_128, False)
+
+DEFAULT_ALGORITHM = "sha256"
+
+# Files at least this big are hashed straight from a read-only memory map
+MMAP_THRESHOLD = 64 * 1024 * 1024
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 4 * 1024 * 1024
+# A memory map is hashed this much at a time, so progress is reported between slices
+MMAP_SLICE = 64 * 1024 * 1024
+
+# One reusable read buffer per thread, so hashing never allocates per chunk; also
+# holds the thread's progress hook
+_local = threading.local()
+
+def set_progress_hook(hook):
+    """Calls hook() after every chunk this thread hashes or copies (None to stop)."""
+    _local.progress = hook
+
+def report_progress():
+    """Called by long reads and copies between chunks; lets an I/O watchdog see they still move."""
+    hook = getattr(_local, "progress", None)
+    if hook is not None:
+        hook()
+
+def _chunk_size_for(size: int) -> int:
+    """Smallest power of two covering the file, clamped to [MIN_CHUNK, MAX_CHUNK]."""
+    return min(MAX_CHUNK, max(MIN_CHUNK, 1 << max(0, size - 1).bit_length()))
+
+def _thread_buffer() -> memoryview:
+    view = getattr(_local, "view", None)
+    if view is None:
+        view = memoryview(bytearray(MAX_CHUNK))
+        _local.view = view
+    return view
+
+def new_hasher(algorithm: str = DEFAULT_ALGORITHM):
+    try:
+        return ALGORITHMS[algorithm][0]()
+    except KeyError:
+        raise ValueError(f"Unknown hash algorithm '{algorithm}'. Available: {', '.join(ALGORITHMS)}")
+
+def format_digest(algorithm: str, h) -> str:
+    """Digests carry their algorithm ('blake2b:ab12...') so caches never mix algorithms."""
+    return f"{algorithm}:{h.hexdigest()}"
+
+def hash_file(path: Path, size: Optional[int] = None, algorithm: str = DEFAULT_ALGORITHM) -> str:
+    """
+    Digest of a file without per-chunk allocations: readinto() a reused buffer,
+    or mmap for large files. hashlib releases the GIL on big updates, so several
+    threads can hash in parallel.
+    """
+    h = new_hasher(algorithm)
+    with open(path, 'rb', buffering=0) as f:
+        if size is None:
+            size = os.fstat(f.fileno()).st_size
+
+        if size >= MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, "madvise"):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    with memoryview(mm) as view:
+                        for offset in range(0, len(view), MMAP_SLICE):
+                            h.update(view[offset:offset + MMAP_SLICE])
+                            report_progress()
+                return format_digest(algorithm, h)
+            except (ValueError, OSError):
+                # File shrank or the filesystem doesn't support mmap; fall back to reads
+                h = new_hasher(algorithm)
+                f.seek(0)
+
+        buf = _thread_buffer()[:_chunk_size_for(size)]
+        while n := f.readinto(buf):
+            h.update(buf[:n])
+            report_progress()
+    return format_digest(algorithm, h)
+
+def copy_and_hash(src, dst, algorithm: str = DEFAULT_ALGORITHM) -> str:
+    """
+    Copies between two unbuffered binary files and hashes the data on the way through,
+    so a verified copy reads the source exactly once. Returns the digest.
+    """
+    h = new_hasher(algorithm)
+    buf = _thread_buffer()
+    while n := src.readinto(buf):
+        chunk = buf[:n]
+        h.update(chunk)
+        written = 0
+        while written < n:
+            written += dst.write(chunk[written:])
+        report_progress()
+    return format_digest(algorithm, h)
+
+class HashingService:
+    """
+    Thread pool that hashes files concurrently.
+    Submissions block once `max_inflight_bytes` of file data is queued or being
+    hashed, which caps memory and page-cache pressure however fast callers submit.
+    """
+    def __init__(self, workers: int = 4, max_inflight_bytes: int = 256 * 1024 * 1024, algorithm: str = DEFAULT_ALGORITHM):
+        new_hasher(algorithm)  # Fail fast on unknown names
+        self.algorithm = algorithm
+        self.workers = max(1, workers)
+        self.max_inflight_bytes = max_inflight_bytes
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hasher")
+        self._budget = threading.Condition()
+        self._inflight = 0
+
+    def submit(self, path: Path, size: int) -> Future:
+        """Queues one file and returns a Future resolving to its hex digest."""
+        # A single huge file may exceed the budget on its own; it then runs alone
+        cost = min(size, self.max_inflight_bytes)
+        with self._budget:
+            while self._inflight and self._inflight + cost > self.max_inflight_bytes:
+                self._budget.wait()
+            self._inflight += cost
+
+        future = self._pool.submit(hash_file, path, size, self.algorithm)
+        future.add_done_callback(lambda _f: self._release(cost))
+        return future
+
+    def submit_batch(self, files: Iterable[tuple[Path, int]]) -> list[Future]:
+        """Queues (path, size) pairs; futures are returned in the same order."""
+        return [self.submit(path, size) for path, size in files]
+
+    def _release(self, cost: int):
+        with self._budget:
+            self._inflight -= cost
+            self._budget.notify_all()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
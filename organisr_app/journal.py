@@ -0,0 +1,307 @@
+import os
+import json
+import errno
+import shutil
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = Path.home() / ".organisr" / "journal"
+
+class MoveJournal:
+    """
+    Append-only write-ahead log of the moves one run makes, one JSON object per line:
+
+        {"run": id, "sources": [...], "dest": ..., "dedup_mode": ..., "plan": ...,
+         "options": {...}}                                    header; options are the sweep's settings
+        {"i": seq, "kind": "MOVE", "src": ..., "dst": ...}    intent, written before the rename
+                                                              (again with the same seq if the name changes)
+        {"d": seq, "dst": ...}                                done, with the name actually used
+        {"f": seq}                                            failed, nothing changed
+        {"mkdir": path}                                       folder created by the run
+        {"r": seq}                                            put back by an undo
+        {"end": timestamp} / {"undone": timestamp}
+
+    Every record goes to the OS with one write() as it happens, so a crashed process
+    loses nothing. fsync is group-committed by a background thread every FSYNC_INTERVAL,
+    which bounds what a power cut can lose without paying a disk flush per move.
+    """
+    FSYNC_INTERVAL = 0.05
+
+    def __init__(self, path: Path, header: dict = None):
+        self.path = Path(path)
+        self.run_id = self.path.stem
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.path.exists()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Source -> destination of moves finished before this journal was reopened
+        self.completed: Dict[str, str] = {}
+        if not is_new:
+            # Continue numbering after the entries already in the file
+            state = read_journal(self.path)
+            self._seq = max((e.seq for e in state.entries), default=-1) + 1
+            self.completed = {e.src: e.dst for e in state.entries if e.state == "done"}
+        self._dirty = threading.Event()
+        self._closed = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop, name="journal-fsync", daemon=True)
+        self._syncer.start()
+        if is_new:
+            self._append({"run": self.run_id, **(header or {})})
+
+    @classmethod
+    def create(cls, sources, dest: Path, dedup_mode: str = 'trash', plan: Path = None, options: dict = None) -> "MoveJournal":
+        run_id = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = JOURNAL_DIR / f"{run_id}.jsonl"
+        n = 1
+        while path.exists():
+            path = JOURNAL_DIR / f"{run_id}-{n}.jsonl"
+            n += 1
+        return cls(path, {
+            "sources": [str(p) for p in sources],
+            "dest": str(dest),
+            "dedup_mode": dedup_mode,
+            "plan": str(plan) if plan else None,
+            "options": options or {},
+        })
+
+    def _append(self, record: dict):
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            os.write(self._fd, line)
+        self._dirty.set()
+
+    def _sync_loop(self):
+        while not self._closed.is_set():
+            self._closed.wait(self.FSYNC_INTERVAL)
+            if self._dirty.is_set():
+                self._dirty.clear()
+                with self._lock:
+                    if self._fd is not None:
+                        os.fsync(self._fd)
+
+    def intend(self, kind: str, src: Path, dst: Path, seq: int = None) -> int:
+        """Records a move about to happen; pass the seq of an earlier intent when its name had to change."""
+        if seq is None:
+            with self._lock:
+                seq = self._seq
+                self._seq += 1
+        self._append({"i": seq, "kind": kind, "src": str(src), "dst": str(dst)})
+        return seq
+
+    def done(self, seq: int, dst: Path):
+        self._append({"d": seq, "dst": str(dst)})
+
+    def failed(self, seq: int):
+        self._append({"f": seq})
+
+    def mkdir(self, path: Path):
+        self._append({"mkdir": str(path)})
+
+    def close(self, finished: bool = True):
+        if finished:
+            self._append({"end": datetime.now().isoformat(timespec="seconds")})
+        self._closed.set()
+        self._syncer.join()
+        with self._lock:
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+@dataclass
+class JournalEntry:
+    seq: int
+    kind: str
+    src: str
+    dst: str
+    # 'done', 'failed', 'pending' (intent without outcome: the run died mid-move)
+    # or 'restored' (a done move an undo put back)
+    state: str = "pending"
+
+@dataclass
+class JournalState:
+    path: Path
+    header: dict
+    entries: List[JournalEntry] = field(default_factory=list)
+    folders: List[str] = field(default_factory=list)
+    finished: bool = False
+    undone: bool = False
+
+    @property
+    def run_id(self) -> str:
+        return self.path.stem
+
+def read_journal(path: Path) -> JournalState:
+    state = JournalState(path=Path(path), header={})
+    by_seq: Dict[int, JournalEntry] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash; everything before it is intact
+                continue
+            if "run" in record:
+                state.header = record
+            elif "i" in record:
+                if record["i"] in by_seq:
+                    # The move switched to another name before renaming
+                    by_seq[record["i"]].dst = record["dst"]
+                    continue
+                entry = JournalEntry(record["i"], record["kind"], record["src"], record["dst"])
+                by_seq[entry.seq] = entry
+                state.entries.append(entry)
+            elif "d" in record and record["d"] in by_seq:
+                by_seq[record["d"]].state = "done"
+                by_seq[record["d"]].dst = record["dst"]
+            elif "f" in record and record["f"] in by_seq:
+                by_seq[record["f"]].state = "failed"
+            elif "r" in record and record["r"] in by_seq:
+                by_seq[record["r"]].state = "restored"
+            elif "mkdir" in record:
+                state.folders.append(record["mkdir"])
+            elif "end" in record:
+                state.finished = True
+            elif "undone" in record:
+                state.undone = True
+    return state
+
+def journal_path(run_id: str) -> Path:
+    return JOURNAL_DIR / f"{run_id}.jsonl"
+
+def list_runs() -> List[str]:
+    if not JOURNAL_DIR.exists():
+        return []
+    return sorted(p.stem for p in JOURNAL_DIR.glob("*.jsonl"))
+
+def latest_unfinished() -> Optional[JournalState]:
+    for run_id in reversed(list_runs()):
+        state = read_journal(journal_path(run_id))
+        # A partly undone run is being rolled back, not continued
+        if not state.finished and not state.undone and not any(e.state == "restored" for e in state.entries):
+            return state
+    return None
+
+def recover(journal: MoveJournal, state: JournalState) -> int:
+    """
+    Settles moves that were in flight when the run died: if the file reached its
+    destination the move is recorded as done, otherwise as failed (and a partial
+    cross-device copy is removed). Returns the number of entries settled.
+    """
+    settled = 0
+    for entry in state.entries:
+        if entry.state != "pending":
+            continue
+        dst = Path(entry.dst)
+        if os.path.lexists(dst) and not os.path.lexists(entry.src):
+            journal.done(entry.seq, dst)
+            journal.completed[entry.src] = entry.dst
+            entry.state = "done"
+        else:
+            try:
+                dst.with_name(f".{dst.name}.organisr-part").unlink()
+            except OSError:
+                pass
+            journal.failed(entry.seq)
+            entry.state = "failed"
+        settled += 1
+    return settled
+
+def _restore(entry: JournalEntry) -> Optional[str]:
+    """Moves one file back. Returns None on success, else 'conflict', 'missing' or 'failed'."""
+    # Imported here: actions imports this module
+    from actions import rename_noreplace
+
+    src, dst = Path(entry.src), Path(entry.dst)
+    if not os.path.lexists(dst):
+        return "missing"
+    try:
+        src.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            rename_noreplace(dst, src)
+        except FileExistsError:
+            return "conflict"
+        except OSError as e:
+            # The move crossed devices, so going back does too
+            if e.errno != errno.EXDEV:
+                raise
+            if os.path.lexists(src):
+                return "conflict"
+            shutil.copy2(dst, src)
+            os.unlink(dst)
+        return None
+    except OSError as e:
+        logger.error(f"Could not restore {src}: {e}")
+        return "failed"
+
+def undo_run(run_id: str, workers: int = 8) -> dict:
+    """
+    Puts every file a run moved back where it was, newest move first. Renames run in
+    parallel; any that collide (something now occupies the original path) are retried
+    one by one at the end. Folders the run created are removed again if left empty.
+    Each restore is recorded, so if some files could not go back (occupied path, I/O
+    error) the run stays undoable and the next undo only retries those.
+    """
+    path = journal_path(run_id)
+    if not path.exists():
+        raise FileNotFoundError(f"No journal for run '{run_id}'. Known runs: {', '.join(list_runs()) or 'none'}")
+    state = read_journal(path)
+    if state.undone:
+        raise ValueError(f"Run '{run_id}' has already been undone")
+
+    restored_fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    record_lock = threading.Lock()
+
+    def restore(entry: JournalEntry) -> Optional[str]:
+        outcome = _restore(entry)
+        if outcome is None:
+            with record_lock:
+                os.write(restored_fd, (json.dumps({"r": entry.seq}) + "\n").encode("utf-8"))
+        return outcome
+
+    todo = []
+    for entry in reversed(state.entries):
+        if entry.state == "done":
+            todo.append(entry)
+        elif entry.state == "pending" and os.path.lexists(entry.dst) and not os.path.lexists(entry.src):
+            # Died between the rename and its 'done' record
+            todo.append(entry)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="undo") as pool:
+            outcomes = list(pool.map(restore, todo))
+
+        # Retry collisions one at a time, newest first: another restore may have freed the path
+        conflicts = [e for e, outcome in zip(todo, outcomes) if outcome == "conflict"]
+        missing = outcomes.count("missing")
+        failed = outcomes.count("failed")
+        unresolved = [e for e in conflicts if restore(e) is not None]
+    finally:
+        os.close(restored_fd)
+    for entry in unresolved:
+        logger.warning(f"Not restored, {entry.src} is occupied: the file is still at {entry.dst}")
+
+    removed = 0
+    for folder in sorted(set(state.folders), key=lambda p: p.count(os.sep), reverse=True):
+        try:
+            os.rmdir(folder)
+            removed += 1
+        except OSError:
+            # Not empty (the user put something there) or already gone
+            pass
+
+    restored = len(todo) - len(unresolved) - missing - failed
+    if unresolved or failed:
+        logger.warning(f"Run '{run_id}' is only partly undone; run the undo again once the files above can go back.")
+    else:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"undone": datetime.now().isoformat(timespec="seconds")}) + "\n")
+    return {"restored": restored, "unresolved": len(unresolved), "missing": missing, "failed": failed,
+            "folders_removed": removed}
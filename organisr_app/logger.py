@@ -1,17 +1,86 @@
-import logging
 import sys
-from config import LOG_FILE
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import LOG_FILE, LOG_MAX_BYTES, LOG_BACKUPS, LOG_SAMPLE_EVERY
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+# Per-file messages (see FileEvents); DEBUG, so off unless setup_logging(verbose=True)
+FILE_LOG = logging.getLogger("organisr.files")
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Enqueues records untouched. The stock prepare() formats every message on the calling
+    thread so it can be pickled; this queue never leaves the process, so formatting
+    is left to the listener thread.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class FileEvents:
+    """
+    Counts per-file events (processing, move, trash, link, skip) and logs a sample of
+    them to FILE_LOG: the first of each kind, then every `every`-th. Messages use
+    %-style arguments, so the ones not sampled are never formatted.
+    """
+    def __init__(self, every: int = LOG_SAMPLE_EVERY):
+        self.every = max(1, every)
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, event: str, msg: str, *args):
+        with self._lock:
+            self.counts[event] += 1
+            n = self.counts[event]
+        if (n == 1 or n % self.every == 0) and FILE_LOG.isEnabledFor(logging.DEBUG):
+            FILE_LOG.debug(msg, *args)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+    def report(self) -> str:
+        with self._lock:
+            counts = ", ".join(f"{event} {n}" for event, n in sorted(self.counts.items())) or "none"
+        sampled = "every" if self.every == 1 else f"1 in {self.every}"
+        return f"Per-file events: {counts} ({sampled} logged at DEBUG)"
+
+file_events = FileEvents()
+
+_listener = None
+
+def setup_logging(verbose: bool = False, sample_every: int = LOG_SAMPLE_EVERY) -> QueueListener:
+    """
+    Configures the logging for the application. Records go through a queue to a
+    listener thread that writes the size-rotated log file and stdout, so the code
+    that logs never waits on log I/O. verbose turns on the sampled per-file messages.
+    """
+    global _listener
+    FILE_LOG.setLevel(logging.DEBUG if verbose else logging.INFO)
+    file_events.every = max(1, sample_every)
+    if _listener is not None:
+        return _listener
+
+    handlers = [RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")]
 
-def setup_logging():
-    """Configures the logging for the application."""
-    handlers = [logging.FileHandler(LOG_FILE)]
-    
     # Only add stdout handler if stdout exists (prevents crash in windowed mode)
     if sys.stdout:
         handlers.append(logging.StreamHandler(sys.stdout))
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=handlers
-    )
\ No newline at end of file
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(_LazyQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Flushes what is still queued when the process exits
+    atexit.register(_listener.stop)
+    return _listener
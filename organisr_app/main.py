@@ -2,14 +2,32 @@ import logging
 import time
 import os
 import argparse
+import multiprocessing
+from contextlib import ExitStack
 from pathlib import Path
-from config import SOURCE_DIRS, DEST_DIR, DRY_RUN
-from logger import setup_logging
+from config import SOURCE_DIRS, DEST_DIR, DRY_RUN, SCAN_WORKERS, HASH_WORKERS, HASH_ALGORITHM, DEDUP_MODE, DEDUP_MEMORY_MB, CLASSIFY_WORKERS, CLASSIFY_CHUNK_SIZE, EXECUTE_WORKERS, VERIFY_COPIES, UNDO_WORKERS, IO_CONCURRENCY, IO_TIMEOUT, IO_RETRIES, REPORT_FORMAT, LOG_SAMPLE_EVERY, PROGRESS_INTERVAL
+from logger import setup_logging, file_events
 from scanner import FileScanner
+from scan_index import ScanIndex
+from hash_cache import HashCache
+from dest_index import DestinationIndex
+from hasher import HashingService, ALGORITHMS
+from watcher import WatchDaemon
 from deduplicator import Deduplicator
+from dedup_index import peak_rss_bytes
+from manifest import open_manifests
+from pipeline import OrganizerPipeline, check_file, finish_file, update_destination_index
+from plan_file import PlanWriter, read_plan, plan_from_record, source_unchanged, count_plan_records
+from journal import MoveJournal, latest_unfinished, recover, undo_run
+from async_io import IOLimiter, AsyncScanner, LimitedHasher
+from reports import ResultsSink, REPORT_FORMATS, new_report_dir
+from empty_dirs import EmptyDirTracker
+from progress import ProgressTracker
+from models import FileContext, ActionPlan
 from domain_inference import DomainInference
-from actions import ActionExecutor
+from actions import ActionExecutor, DEDUP_MODES, InsufficientSpaceError, cross_device_budget
 from ai_optimizer import AIOptimizer
+import near_duplicates
 from ai_service import LocalIntelligenceEngine
 
 def get_global_defaults():
@@ -24,10 +42,96 @@ def get_global_defaults():
     dest = home / "Documents" / "Organized"
     return sources, dest
 
-def run_organizer_logic(source_dirs, dest_dir, dry_run=True, user_context=""):
+def process_file(context, deduplicator, ai_optimizer, domain_engine, executor):
+    """
+    Runs a single file through dedup, analysis, inference, planning and execution.
+    Returns (plan, executed_ok, domain, theme).
+    """
+    # 1. Check duplicates, backups and space usage
+    original, backed_up_in = check_file(context, deduplicator, ai_optimizer)
+
+    # 2. Inference
+    domain, theme, score, reasons = domain_engine.infer_domain_and_theme(context)
+
+    # 3. Create Action Plan
+    plan = executor.create_plan(
+        source=context.path,
+        domain=domain,
+        theme=theme,
+        is_duplicate=original is not None,
+        duplicate_of=original,
+        backed_up_in=backed_up_in,
+        context=context
+    )
+
+    # 4. Execute
+    done = executor.execute(plan)
+    finish_file(context, plan, deduplicator)
+    return plan, done, domain, theme
+
+def run_organizer_logic(
+    source_dirs,
+    dest_dir,
+    dry_run=True,
+    user_context="",
+    scan_workers=1,
+    ordered_scan=False,
+    incremental=False,
+    use_hash_cache=True,
+    hash_workers=1,
+    hash_algorithm=HASH_ALGORITHM,
+    dedup_mode=DEDUP_MODE,
+    find_near_duplicates=False,
+    use_dest_index=True,
+    dedup_memory_mb=DEDUP_MEMORY_MB,
+    manifests=(),
+    pipelined=False,
+    classify_workers=CLASSIFY_WORKERS,
+    execute_workers=EXECUTE_WORKERS,
+    classify_in_processes=False,
+    plan_path=None,
+    verify_copies=VERIFY_COPIES,
+    journal=None,
+    async_io=False,
+    io_concurrency=IO_CONCURRENCY,
+    io_timeout=IO_TIMEOUT,
+    io_retries=IO_RETRIES,
+    report_dir=None,
+    report_format=REPORT_FORMAT,
+    progress=None,
+    progress_interval=PROGRESS_INTERVAL,
+):
     """
     Core logic wrapper to allow calling from GUI or CLI.
-    Returns (count_of_files, time_taken_seconds, ai_report)
+    Returns a dict of aggregates (counts, timings, ai_report) and the paths of the run's reports.
+    Per-file records stream to report files (see reports.ResultsSink) instead of being
+    returned, so memory does not grow with the tree.
+    scan_workers > 1 walks all sources in parallel; ordered_scan keeps the serial file order.
+    incremental only processes files that are new or changed since the last real run.
+    use_hash_cache reuses content hashes from earlier runs for files whose stat data is unchanged.
+    hash_workers > 1 hashes duplicate candidates on a thread pool.
+    hash_algorithm picks the digest (see `python benchmark.py bench-hash`).
+    dedup_mode 'hardlink' or 'reflink' replaces duplicates with links instead of trashing them.
+    find_near_duplicates groups visually similar images in the space report (needs Pillow).
+    use_dest_index catches files that were already organised by an earlier run.
+    dedup_memory_mb caps the in-memory dedup index; past it the index spills to disk.
+    manifests are backup hash manifests (see manifest.py); listed files get a 'Backed up in' reason.
+    pipelined overlaps scanning, classification and moves (see pipeline.OrganizerPipeline);
+    classify_workers / execute_workers size its pools, classify_in_processes uses processes for classification.
+    plan_path streams every plan (with source fingerprints) to a JSONL file that apply_plan can execute later.
+    verify_copies checksums every cross-device move (same-device moves are plain renames).
+    Real runs budget the free space on dest_dir's device when a source is on another one
+    (actions.cross_device_budget): copies that would not fit fail instead of filling it.
+    journal continues an interrupted run's move journal (see resume_run); real runs otherwise start a new one.
+    If the run fails part way, everything it opened is closed, its journal is left for resume_run
+    and summary.json records the error.
+    async_io is for high-latency (SMB/NFS) sources: listings, hashing reads and moves go through an
+    asyncio limiter (io_concurrency calls at once, each abandoned after io_timeout seconds without
+    progress, io_retries for transient read errors);
+    it implies pipelined, with one move shard per concurrent call.
+    report_dir / report_format choose where and how reports are written (default: a new folder under ~/.organisr/reports).
+    progress, if given, is called with a progress.ProgressEvent at most every progress_interval seconds
+    (files and bytes discovered / processed, rates, ETA from a sampled pre-count), and once at the end.
     """
     logger = logging.getLogger(__name__)
     
@@ -39,40 +143,186 @@ def run_organizer_logic(source_dirs, dest_dir, dry_run=True, user_context=""):
             dest_dir = default_dest
 
     start_time = time.time()
-    scanner = FileScanner(source_dirs)
-    deduplicator = Deduplicator()
-    
-    # Initialize Local AI Service
-    ai_service = LocalIntelligenceEngine(user_context)
-    domain_engine = DomainInference(ai_service=ai_service)
-    
-    executor = ActionExecutor(dest_dir, dry_run=dry_run)
-    ai_optimizer = AIOptimizer()
-
-    count = 0
-    for context in scanner.scan():
-        count += 1
-        logger.info(f"Processing: {context.filename}")
-
-        # 1. Check Duplicates
-        is_dup = deduplicator.is_duplicate(context)
+    file_events.reset()
+    # Cross-device copies draw on the destination's free space; the ones that don't fit fail
+    space_budget = {} if dry_run else cross_device_budget(source_dirs, dest_dir)
+    # Everything opened below is closed (journal left unfinished, reports still written) if the run fails;
+    # a run that gets through its files disarms this and closes them in order further down.
+    with ExitStack() as on_error:
+        # Dry runs read the index but never update it, so a preview can't hide files from the real run
+        scan_index = ScanIndex() if incremental else None
+        if scan_index:
+            on_error.callback(scan_index.close)
+        hash_cache = HashCache() if use_hash_cache else None
+        if hash_cache:
+            on_error.callback(hash_cache.close)
+        # Source folders emptied by the run are tallied as files leave, not found by a second walk
+        empty_dirs = None if dry_run else EmptyDirTracker(source_dirs, dest_dir)
+        listed = empty_dirs.listed if empty_dirs else None
+        limiter = None
+        if async_io:
+            limiter = IOLimiter(io_concurrency, timeout=io_timeout, retries=io_retries)
+            on_error.callback(limiter.close)
+            scanner = AsyncScanner(source_dirs, limiter, ordered=ordered_scan, index=scan_index, listed=listed)
+            hasher = LimitedHasher(limiter, hash_algorithm)
+            pipelined = True
+            execute_workers = max(execute_workers, io_concurrency)
+        else:
+            scanner = FileScanner(source_dirs, workers=scan_workers, ordered=ordered_scan, index=scan_index, listed=listed)
+            hasher = HashingService(workers=hash_workers, algorithm=hash_algorithm) if hash_workers > 1 else None
+        if hasher:
+            on_error.callback(hasher.shutdown)
+        dest_index = DestinationIndex(dest_dir) if use_dest_index else None
+        if dest_index:
+            on_error.callback(dest_index.close)
+        if dest_index and dest_index.is_empty():
+            indexed = dest_index.sync()
+            logger.info(f"Indexed {indexed} files already in the destination folder.")
+        deduplicator = Deduplicator(hash_cache=hash_cache, hasher=hasher, algorithm=hash_algorithm, dest_index=dest_index,
+                                    memory_limit=dedup_memory_mb * 1024 * 1024, manifests=open_manifests(manifests),
+                                    io=limiter.call if limiter else None)
+        on_error.callback(deduplicator.close)
         
-        # 2. AI Analysis (Space & Structure)
-        ai_optimizer.analyze(context)
+        # Initialize Local AI Service
+        ai_service = LocalIntelligenceEngine(user_context)
+        domain_engine = DomainInference(ai_service=ai_service)
         
-        # 3. Inference
-        domain, theme, score, reasons = domain_engine.infer_domain_and_theme(context)
-        
-        # 4. Create Action Plan
-        plan = executor.create_plan(
-            source=context.path,
-            domain=domain,
-            theme=theme,
-            is_duplicate=is_dup
-        )
+        if not dry_run and journal is None:
+            # Stored so resume_run continues with the same settings
+            options = {
+                "scan_workers": scan_workers, "ordered_scan": ordered_scan, "incremental": incremental,
+                "use_hash_cache": use_hash_cache, "hash_workers": hash_workers, "hash_algorithm": hash_algorithm,
+                "find_near_duplicates": find_near_duplicates, "use_dest_index": use_dest_index,
+                "dedup_memory_mb": dedup_memory_mb, "manifests": [str(m) for m in manifests],
+                "pipelined": pipelined, "classify_workers": classify_workers, "execute_workers": execute_workers,
+                "classify_in_processes": classify_in_processes, "async_io": async_io,
+                "io_concurrency": io_concurrency, "io_timeout": io_timeout, "io_retries": io_retries,
+            }
+            journal = MoveJournal.create(source_dirs, dest_dir, dedup_mode, options=options)
+        if journal:
+            logger.info(f"Run id: {journal.run_id} (undo with: main.py --undo {journal.run_id})")
+
+            def abandon_journal():
+                # Left without an end record so resume_run can pick the run up again
+                if limiter:
+                    limiter.wait_idle("move")
+                journal.close(finished=False)
+            on_error.callback(abandon_journal)
+        sink = ResultsSink(report_dir or new_report_dir(), report_format)
+
+        def close_failed_reports(exc_type, exc, tb):
+            sink.close({"error": f"{exc_type.__name__}: {exc}", "dry_run": dry_run})
+        on_error.push(close_failed_reports)
+        executor = ActionExecutor(dest_dir, dry_run=dry_run, dedup_mode=dedup_mode, verify_copies=verify_copies,
+                                  journal=journal, sink=sink, empty_dirs=empty_dirs, space_budget=space_budget)
+
+        near_dup_index = None
+        if find_near_duplicates:
+            if near_duplicates.is_available():
+                near_dup_index = near_duplicates.NearDuplicateIndex()
+            else:
+                logger.warning("Near-duplicate image detection needs Pillow (pip install pillow); skipping.")
+        ai_optimizer = AIOptimizer(near_duplicates=near_dup_index, sink=sink)
+
+        plan_writer = PlanWriter(plan_path, source_dirs, dest_dir, dedup_mode) if plan_path else None
+        if plan_writer:
+            on_error.callback(plan_writer.close)
 
-        # 5. Execute
-        executor.execute(plan)
+        tracker = None
+        if progress:
+            tracker = ProgressTracker(progress, progress_interval)
+            if scan_index:
+                tracker.skipped = lambda: scanner.unchanged_files
+            tracker.count(source_dirs)
+            for free in space_budget.values():
+                if tracker.bytes_estimate > free:
+                    logger.warning(f"The sources hold about {tracker.bytes_estimate / 1024 / 1024:.0f} MB but the destination "
+                                   f"has {free / 1024 / 1024:.0f} MB to spare; moves that don't fit will fail.")
+        contexts = tracker.discover(scanner.scan()) if tracker else scanner.scan()
+        # Stops the walker threads of a scan that is abandoned part way
+        on_error.callback(contexts.close)
+
+        def record_result(context, plan, done, domain, theme):
+            sink.action(plan, done, context.size_bytes)
+            if tracker:
+                tracker.processed(context.size_bytes)
+            if plan_writer:
+                plan_writer.add(plan, context)
+            if hash_cache and done and plan.final_path:
+                hash_cache.moved(context, plan.final_path)
+            if scan_index and not dry_run and done:
+                if plan.action_type == 'SKIP':
+                    scan_index.record_file(context, domain, theme)
+                else:
+                    scan_index.mark_moved(plan.source)
+
+        pipeline = None
+        if pipelined:
+            pipeline = OrganizerPipeline(
+                deduplicator, ai_optimizer, domain_engine, executor,
+                classify_workers=classify_workers,
+                execute_workers=execute_workers,
+                classify_in_processes=classify_in_processes,
+                user_context=user_context,
+                classify_chunk=CLASSIFY_CHUNK_SIZE,
+                io=limiter.call if limiter else None
+            )
+            count = pipeline.run(contexts, record_result)
+            logger.info(f"Pipeline peak queue depths: {pipeline.peak_depths}")
+        else:
+            count = 0
+            for context in contexts:
+                # The destination may live inside a source and be listed after files were moved into it
+                if context.path in executor.placed_paths:
+                    continue
+
+                count += 1
+                plan, done, domain, theme = process_file(context, deduplicator, ai_optimizer, domain_engine, executor)
+                record_result(context, plan, done, domain, theme)
+
+        if limiter:
+            # A move that timed out keeps running and still writes to the journal when it lands
+            limiter.wait_idle("move")
+        on_error.pop_all()
+    logger.info(executor.syscall_report(count))
+    logger.info(file_events.report())
+    logger.info(f"Moves: {executor.renamed} renamed in place, {executor.copied} copied across devices.")
+    if journal:
+        journal.close()
+
+    if plan_writer:
+        plan_writer.close()
+        logger.info(f"Wrote {plan_writer.count} plans to {plan_path} (apply with: main.py --apply {plan_path})")
+
+    if scan_index:
+        if not dry_run:
+            scan_index.commit()
+        scan_index.close()
+        logger.info(f"Incremental scan: skipped {scanner.unchanged_files} unchanged files and {scanner.unchanged_dirs} unchanged folders.")
+
+    if hasher:
+        hasher.shutdown()
+    if limiter:
+        logger.info(limiter.report())
+        limiter.close()
+
+    if dest_index:
+        dest_index.close()
+        logger.info(f"Destination index caught {deduplicator.destination_matches} files that were already organised.")
+
+    if hash_cache:
+        evicted = hash_cache.evict_missing()
+        hash_cache.close()
+        logger.info(f"Hash cache: {hash_cache.hits} hits, {hash_cache.misses} misses, {evicted} stale entries evicted.")
+    logger.info(f"Deduplication read {deduplicator.bytes_read / 1024 / 1024:.2f} MB ({deduplicator.full_hashes} full hashes).")
+    if deduplicator.manifests:
+        logger.info(f"{deduplicator.manifest_matches} files are already in a backup manifest.")
+    dedup_peak = deduplicator.index.peak_bytes
+    dedup_spills = deduplicator.index.spills
+    deduplicator.close()
+    peak_rss = peak_rss_bytes()
+    logger.info(f"Dedup index peaked at {dedup_peak / 1024 / 1024:.2f} MB ({dedup_spills} spills to disk)"
+                + (f"; process peak memory {peak_rss / 1024 / 1024:.0f} MB." if peak_rss else "."))
 
     # Generate AI Report
     ai_optimizer.infer_structure()
@@ -80,40 +330,339 @@ def run_organizer_logic(source_dirs, dest_dir, dry_run=True, user_context=""):
     structure_report = "\n".join(ai_optimizer.proposals["suggested_folders"])
     full_report = f"\n--- AI OPTIMIZER REPORT ---\n{space_report}\n\n{structure_report}\n---------------------------"
 
-    # Find empty folders in source directories (Post-organization cleanup)
-    empty_folders = []
-    if not dry_run:
-        for src in source_dirs:
-            if src.exists():
-                for root, dirs, files in os.walk(src, topdown=False):
-                    for name in dirs:
-                        d = Path(root) / name
-                        try:
-                            # Check if directory is empty
-                            if not any(d.iterdir()):
-                                empty_folders.append(str(d))
-                        except OSError:
-                            pass
+    # Empty folders left in the sources (post-organization cleanup), deepest first
+    if empty_dirs:
+        for folder in empty_dirs.empty_dirs():
+            sink.folder("empty", folder)
 
     duration = time.time() - start_time
-    
-    # Return comprehensive results dict
-    return {
+    results = {
         "count": count,
         "duration": duration,
         "ai_report": full_report,
-        "moved_files": executor.moved_files,
-        "created_folders": list(executor.created_folders),
-        "empty_folders": empty_folders
+        "moved": sink.actions["MOVE"],
+        "trashed": sink.actions["TRASH"],
+        "linked": sink.actions["LINK"],
+        "skipped": sink.actions["SKIP"],
+        "failed": sink.failed,
+        "bytes_moved": sink.bytes_moved,
+        "created_folders": executor.folders_created,
+        "empty_folders": sink.folders["empty"],
+        "unchanged_files": scanner.unchanged_files,
+        "unchanged_dirs": scanner.unchanged_dirs,
+        "hash_cache_hits": hash_cache.hits if hash_cache else 0,
+        "hash_cache_misses": hash_cache.misses if hash_cache else 0,
+        "dedup_bytes_read": deduplicator.bytes_read,
+        "destination_duplicates": deduplicator.destination_matches,
+        "backed_up_files": deduplicator.manifest_matches,
+        "pipeline_queue_peaks": pipeline.peak_depths if pipeline else {},
+        "plan_path": str(plan_path) if plan_path else None,
+        "fs_calls": sum(executor.fs_calls.values()),
+        "fs_calls_saved": sum(executor.fs_calls_saved.values()),
+        "dedup_index_peak_bytes": dedup_peak,
+        "dedup_index_spills": dedup_spills,
+        "peak_memory_bytes": peak_rss,
+        "run_id": journal.run_id if journal else None,
+        "io_timeouts": sum(limiter.timeouts.values()) if limiter else 0,
+        "io_retries": sum(limiter.retried.values()) if limiter else 0,
+        "file_events": dict(file_events.counts),
+        "dry_run": dry_run
+    }
+    results["reports"] = sink.close({k: v for k, v in results.items() if k != "ai_report"})
+    logger.info(f"Reports written to {sink.directory}")
+    if tracker:
+        tracker.finish()
+    return results
+
+# Plans grouped per target folder at a time when applying a plan file
+APPLY_BATCH_SIZE = 5000
+
+def apply_plan(plan_path, use_dest_index=True, verify_copies=VERIFY_COPIES, journal=None,
+               report_dir=None, report_format=REPORT_FORMAT, progress=None, progress_interval=PROGRESS_INTERVAL):
+    """
+    Executes a plan file written by an earlier (dry) run without scanning, hashing or
+    classifying again. Each source is checked against its planned stat fingerprint
+    first; files changed or gone since are skipped. Plans are executed in batches
+    grouped by target folder (ActionExecutor.execute_batch).
+    journal continues an interrupted application of the same plan; its finished moves are skipped.
+    progress works as in run_organizer_logic; the total is the plan's line count.
+    """
+    logger = logging.getLogger(__name__)
+    start_time = time.time()
+    file_events.reset()
+
+    header, records = read_plan(plan_path)
+    source_dirs = [Path(p) for p in header["sources"]]
+    dest_dir = Path(header["dest"])
+    dedup_mode = header.get("dedup_mode", "trash")
+    # As in run_organizer_logic: on failure the journal stays resumable and the reports are still written
+    with ExitStack() as on_error:
+        if journal is None:
+            journal = MoveJournal.create(source_dirs, dest_dir, dedup_mode, plan=plan_path)
+        logger.info(f"Run id: {journal.run_id} (undo with: main.py --undo {journal.run_id})")
+        on_error.callback(journal.close, finished=False)
+        sink = ResultsSink(report_dir or new_report_dir(), report_format)
+
+        def close_failed_reports(exc_type, exc, tb):
+            sink.close({"error": f"{exc_type.__name__}: {exc}"})
+        on_error.push(close_failed_reports)
+        # Nothing is listed here, so only the folders files leave get checked at the end
+        empty_dirs = EmptyDirTracker(source_dirs, dest_dir)
+        executor = ActionExecutor(dest_dir, dry_run=False, dedup_mode=dedup_mode, verify_copies=verify_copies,
+                                  journal=journal, sink=sink, empty_dirs=empty_dirs)
+        dest_index = DestinationIndex(dest_dir) if use_dest_index else None
+        if dest_index:
+            on_error.callback(dest_index.close)
+        tracker = None
+        if progress:
+            tracker = ProgressTracker(progress, progress_interval)
+            tracker.set_estimate(count_plan_records(plan_path))
+        # Where planned files actually landed, so a link can follow an original that was moved first
+        landed = {}
+
+        def run_batch(batch):
+            # Links last: their original may be moved by a plan in the same batch
+            moves = [(p, st) for p, st in batch if p.action_type != 'LINK']
+            links = [(p, st) for p, st in batch if p.action_type == 'LINK']
+            for group in (moves, links):
+                for plan, _st in group:
+                    if plan.action_type == 'LINK':
+                        plan.destination = landed.get(str(plan.destination), plan.destination)
+                outcomes = executor.execute_batch([plan for plan, _st in group])
+                for (plan, st), done in zip(group, outcomes):
+                    sink.action(plan, done, st.st_size)
+                    if tracker:
+                        tracker.processed(st.st_size)
+                    if not plan.final_path:
+                        continue
+                    landed[str(plan.source)] = plan.final_path
+                    p = plan.final_path
+                    context = FileContext(
+                        path=p, filename=p.name, extension=p.suffix, parent_folder=p.parent.name,
+                        size_bytes=st.st_size, mtime_ns=st.st_mtime_ns, inode=st.st_ino, device=st.st_dev
+                    )
+                    update_destination_index(dest_index, plan, context)
+
+        count = 0
+        changed = 0
+        resumed = 0
+        batch = []
+        for record in records:
+            count += 1
+            if tracker:
+                tracker.found(record["fp"][0])
+            if record["src"] in journal.completed:
+                # Moved before the interrupted run stopped
+                resumed += 1
+                landed[record["src"]] = Path(journal.completed[record["src"]])
+                if tracker:
+                    tracker.processed(record["fp"][0])
+                continue
+            st = source_unchanged(record)
+            if st is None:
+                changed += 1
+                logger.warning(f"Skipping {record['src']}: changed or missing since the plan was made")
+                sink.action(ActionPlan(Path(record["src"]), Path(record["src"]), 'SKIP',
+                                       "Changed or missing since the plan was made"), True)
+                if tracker:
+                    tracker.processed()
+                continue
+            batch.append((plan_from_record(record, st), st))
+            if len(batch) >= APPLY_BATCH_SIZE:
+                run_batch(batch)
+                batch = []
+        if tracker:
+            tracker.discovery_done = True
+        run_batch(batch)
+        on_error.pop_all()
+    logger.info(executor.syscall_report(count))
+    logger.info(file_events.report())
+    logger.info(f"Moves: {executor.renamed} renamed in place, {executor.copied} copied across devices.")
+    journal.close()
+    if resumed:
+        logger.info(f"Resumed: {resumed} actions were already done by the interrupted run.")
+
+    if dest_index:
+        dest_index.close()
+    if changed:
+        logger.warning(f"{changed} files changed since the plan was made and were left in place.")
+
+    for folder in empty_dirs.empty_dirs():
+        sink.folder("empty", folder)
+
+    results = {
+        "count": count,
+        "duration": time.time() - start_time,
+        "ai_report": f"Applied plan {plan_path}",
+        "moved": sink.actions["MOVE"],
+        "trashed": sink.actions["TRASH"],
+        "linked": sink.actions["LINK"],
+        "skipped": sink.actions["SKIP"],
+        "failed": sink.failed,
+        "bytes_moved": sink.bytes_moved,
+        "created_folders": executor.folders_created,
+        "empty_folders": sink.folders["empty"],
+        "changed_sources": changed,
+        "resumed_actions": resumed,
+        "fs_calls": sum(executor.fs_calls.values()),
+        "fs_calls_saved": sum(executor.fs_calls_saved.values()),
+        "run_id": journal.run_id,
+        "file_events": dict(file_events.counts),
+        "dry_run": False
     }
+    results["reports"] = sink.close({k: v for k, v in results.items() if k != "ai_report"})
+    logger.info(f"Reports written to {sink.directory}")
+    if tracker:
+        tracker.finish()
+    return results
+
+def resume_run(user_context="", verify_copies=VERIFY_COPIES, report_dir=None, report_format=REPORT_FORMAT,
+               progress=None, progress_interval=PROGRESS_INTERVAL):
+    """
+    Finishes the most recent run that never completed (crash, power cut, kill): moves
+    caught mid-flight are settled from what is on disk, then the run continues in the
+    same journal, so one --undo still reverts all of it. Plan applications skip the
+    actions already done; sweeps re-scan with the settings the run started with, and
+    finished moves are gone from the sources.
+    Returns the run's results, or None if there is nothing to resume.
+    """
+    logger = logging.getLogger(__name__)
+    state = latest_unfinished()
+    if state is None:
+        return None
+    journal = MoveJournal(state.path)
+    settled = recover(journal, state)
+    logger.info(f"Resuming run {state.run_id}: {len(journal.completed)} moves already done, "
+                f"{settled} interrupted moves settled.")
+    header = state.header
+    if header.get("plan"):
+        return apply_plan(header["plan"], verify_copies=verify_copies, journal=journal,
+                          report_dir=report_dir, report_format=report_format,
+                          progress=progress, progress_interval=progress_interval)
+    # Journals written before the settings were stored fall back to the defaults
+    options = header.get("options", {})
+    return run_organizer_logic(
+        [Path(p) for p in header["sources"]], Path(header["dest"]), dry_run=False, user_context=user_context,
+        dedup_mode=header.get("dedup_mode", "trash"), verify_copies=verify_copies, journal=journal,
+        report_dir=report_dir, report_format=report_format,
+        progress=progress, progress_interval=progress_interval, **options
+    )
+
+def watch_organizer(
+    source_dirs,
+    dest_dir,
+    dry_run=True,
+    user_context="",
+    settle_seconds=2.0,
+    batch_size=50,
+    stop_event=None,
+    use_hash_cache=True,
+    hash_workers=1,
+    hash_algorithm=HASH_ALGORITHM,
+    dedup_mode=DEDUP_MODE,
+    use_dest_index=True,
+    dedup_memory_mb=DEDUP_MEMORY_MB,
+    manifests=(),
+):
+    """
+    Long-running watch mode (Linux): organises files as they arrive instead of sweeping
+    the whole tree. Blocks until stop_event is set or the process is interrupted.
+    The deduplication options work as in run_organizer_logic.
+    """
+    logger = logging.getLogger(__name__)
+
+    if not source_dirs:
+        source_dirs, default_dest = get_global_defaults()
+        if not dest_dir:
+            dest_dir = default_dest
+
+    # Components live for the whole session so dedup remembers earlier arrivals
+    with ExitStack() as session:
+        hash_cache = HashCache() if use_hash_cache else None
+        if hash_cache:
+            session.callback(hash_cache.close)
+        hasher = HashingService(workers=hash_workers, algorithm=hash_algorithm) if hash_workers > 1 else None
+        if hasher:
+            session.callback(hasher.shutdown)
+        dest_index = DestinationIndex(dest_dir) if use_dest_index else None
+        if dest_index:
+            session.callback(dest_index.close)
+            if dest_index.is_empty():
+                dest_index.sync()
+        deduplicator = Deduplicator(hash_cache=hash_cache, hasher=hasher, algorithm=hash_algorithm, dest_index=dest_index,
+                                    memory_limit=dedup_memory_mb * 1024 * 1024, manifests=open_manifests(manifests))
+        session.callback(deduplicator.close)
+        domain_engine = DomainInference(ai_service=LocalIntelligenceEngine(user_context))
+        journal = None if dry_run else MoveJournal.create(source_dirs, dest_dir, dedup_mode)
+        if journal:
+            session.callback(journal.close)
+        executor = ActionExecutor(dest_dir, dry_run=dry_run, dedup_mode=dedup_mode, journal=journal)
+        ai_optimizer = AIOptimizer()
+
+        def handle_batch(paths):
+            organised = 0
+            for path in paths:
+                if path in executor.placed_paths:
+                    continue
+                context = FileScanner.context_for(path)
+                if context is None:
+                    continue
+                process_file(context, deduplicator, ai_optimizer, domain_engine, executor)
+                organised += 1
+            if organised:
+                logger.info(f"Watch: processed {organised} new files.")
+
+        daemon = WatchDaemon(
+            source_dirs, handle_batch,
+            exclude_dirs=[dest_dir],
+            settle_seconds=settle_seconds,
+            batch_size=batch_size
+        )
+        daemon.run(stop_event)
 
 def main():
     parser = argparse.ArgumentParser(description="File Organizer Pro CLI")
     parser.add_argument("--force", action="store_true", help="Force execution (disable dry-run)")
+    parser.add_argument("--scan-workers", type=int, default=SCAN_WORKERS, help="Directory traversal threads (1 = serial walk)")
+    parser.add_argument("--ordered-scan", action="store_true", help="Keep depth-first file order when scanning in parallel")
+    parser.add_argument("--incremental", action="store_true", help="Only process files that are new or changed since the last run")
+    parser.add_argument("--no-hash-cache", action="store_true", help="Re-hash every file instead of reusing hashes from earlier runs")
+    parser.add_argument("--hash-workers", type=int, default=HASH_WORKERS, help="Threads used to hash duplicate candidates")
+    parser.add_argument("--hash-algorithm", default=HASH_ALGORITHM, choices=sorted(ALGORITHMS), help="Content digest used for deduplication")
+    parser.add_argument("--dedup-mode", default=DEDUP_MODE, choices=DEDUP_MODES, help="Trash duplicates, or replace them with hard links / reflinks")
+    parser.add_argument("--dedup-memory-mb", type=int, default=DEDUP_MEMORY_MB, help="Memory for the dedup index before it spills to disk")
+    parser.add_argument("--manifest", action="append", type=Path, default=[], help="Backup hash manifest to check files against (repeatable)")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap scanning, classification and moves in separate stages")
+    parser.add_argument("--classify-workers", type=int, default=CLASSIFY_WORKERS, help="Pipeline: classification workers")
+    parser.add_argument("--classify-processes", action="store_true", help="Classify in worker processes instead of threads (implies --pipeline)")
+    parser.add_argument("--execute-workers", type=int, default=EXECUTE_WORKERS, help="Pipeline: threads moving files (one per target folder at a time)")
+    parser.add_argument("--async-io", action="store_true", help="For network mounts: run filesystem calls concurrently with timeouts and retries")
+    parser.add_argument("--io-concurrency", type=int, default=IO_CONCURRENCY, help="Async I/O: filesystem calls in flight at once")
+    parser.add_argument("--io-timeout", type=float, default=IO_TIMEOUT, help="Async I/O: seconds without progress before a call is abandoned")
+    parser.add_argument("--io-retries", type=int, default=IO_RETRIES, help="Async I/O: retries for reads that fail with a transient error")
+    parser.add_argument("--plan-out", type=Path, help="Write every planned action to this JSONL plan file")
+    parser.add_argument("--apply", type=Path, metavar="PLAN", help="Execute a plan file from an earlier dry run instead of scanning")
+    parser.add_argument("--resume", action="store_true", help="Finish the last run that was interrupted before it completed")
+    parser.add_argument("--undo", metavar="RUN_ID", help="Move every file a run moved back where it came from")
+    parser.add_argument("--verbose", action="store_true", help="Log per-file actions at DEBUG (sampled, see --log-every)")
+    parser.add_argument("--log-every", type=int, default=LOG_SAMPLE_EVERY, help="Verbose: log the first and then every Nth action of each kind (1 = all)")
+    parser.add_argument("--progress", type=float, nargs="?", const=10.0, metavar="SECONDS",
+                        help="Log progress (files, rates, ETA) every SECONDS (default 10)")
+    parser.add_argument("--report-dir", type=Path, help="Folder for this run's reports (default: a new one under ~/.organisr/reports)")
+    parser.add_argument("--report-format", default=REPORT_FORMAT, choices=REPORT_FORMATS, help="Format of the per-file reports")
+    parser.add_argument("--verify-copies", action="store_true", default=VERIFY_COPIES, help="Checksum every file moved to another device")
+    parser.add_argument("--near-duplicates", action="store_true", help="Report visually similar images (needs Pillow)")
+    parser.add_argument("--no-dest-index", action="store_true", help="Don't check new files against the already organised destination")
+    parser.add_argument("--watch", action="store_true", help="Keep running and organise new files as they arrive (Linux only)")
+    parser.add_argument("--settle-seconds", type=float, default=2.0, help="Watch mode: quiet time before a file is considered complete")
     args = parser.parse_args()
 
-    setup_logging()
+    setup_logging(verbose=args.verbose, sample_every=args.log_every)
     logger = logging.getLogger(__name__)
+    progress = None
+    if args.progress:
+        def progress(event):
+            logger.info(f"Progress: {event.describe()}")
     logger.info("Starting Organizer CLI...")
 
     # Determine dry_run status: --force overrides config
@@ -124,10 +673,84 @@ def main():
     if not sources or not any(p.exists() for p in sources):
         sources = []
 
-    results = run_organizer_logic(sources, DEST_DIR, is_dry_run)
+    if args.undo:
+        try:
+            undone = undo_run(args.undo, workers=UNDO_WORKERS)
+        except (FileNotFoundError, ValueError) as e:
+            logger.error(str(e))
+            return
+        logger.info(f"Undo {args.undo}: restored {undone['restored']} files, removed {undone['folders_removed']} folders; "
+                    f"{undone['unresolved']} blocked, {undone['missing']} no longer at their destination, "
+                    f"{undone['failed']} failed.")
+        return
+
+    if args.resume:
+        try:
+            results = resume_run(verify_copies=args.verify_copies, report_dir=args.report_dir,
+                                 report_format=args.report_format, progress=progress,
+                                 progress_interval=args.progress or PROGRESS_INTERVAL)
+        except InsufficientSpaceError as e:
+            logger.error(f"Run not resumed: {e.strerror}")
+            return
+        if results is None:
+            logger.info("No interrupted run to resume.")
+        else:
+            logger.info(f"Resumed run {results['run_id']}: processed {results['count']} files in {results['duration']:.2f} seconds.")
+        return
+
+    if args.apply:
+        try:
+            results = apply_plan(args.apply, use_dest_index=not args.no_dest_index, verify_copies=args.verify_copies,
+                                 report_dir=args.report_dir, report_format=args.report_format,
+                                 progress=progress, progress_interval=args.progress or PROGRESS_INTERVAL)
+        except InsufficientSpaceError as e:
+            logger.error(f"Plan not applied: {e.strerror}")
+            return
+        logger.info(f"Applied {results['count'] - results['changed_sources']} of {results['count']} planned actions in {results['duration']:.2f} seconds.")
+        return
+
+    if args.watch:
+        watch_organizer(sources, DEST_DIR, is_dry_run, settle_seconds=args.settle_seconds,
+                        use_hash_cache=not args.no_hash_cache, hash_workers=args.hash_workers,
+                        hash_algorithm=args.hash_algorithm, dedup_mode=args.dedup_mode,
+                        use_dest_index=not args.no_dest_index, dedup_memory_mb=args.dedup_memory_mb,
+                        manifests=args.manifest)
+        return
+
+    results = run_organizer_logic(
+        sources, DEST_DIR, is_dry_run,
+        scan_workers=args.scan_workers,
+        ordered_scan=args.ordered_scan,
+        incremental=args.incremental,
+        use_hash_cache=not args.no_hash_cache,
+        hash_workers=args.hash_workers,
+        hash_algorithm=args.hash_algorithm,
+        dedup_mode=args.dedup_mode,
+        find_near_duplicates=args.near_duplicates,
+        use_dest_index=not args.no_dest_index,
+        dedup_memory_mb=args.dedup_memory_mb,
+        manifests=args.manifest,
+        pipelined=args.pipeline or args.classify_processes,
+        classify_workers=args.classify_workers,
+        execute_workers=args.execute_workers,
+        classify_in_processes=args.classify_processes,
+        plan_path=args.plan_out,
+        verify_copies=args.verify_copies,
+        async_io=args.async_io,
+        io_concurrency=args.io_concurrency,
+        io_timeout=args.io_timeout,
+        io_retries=args.io_retries,
+        report_dir=args.report_dir,
+        report_format=args.report_format,
+        progress=progress,
+        progress_interval=args.progress or PROGRESS_INTERVAL
+    )
     
-    logger.info(f"Organization complete. Processed {results['count']} files in {results['duration']:.2f} seconds.")
+    logger.info(f"Organization complete. Processed {results['count']} files in {results['duration']:.2f} seconds "
+                f"({results['moved']} moved, {results['trashed']} trashed, {results['linked']} linked, {results['failed']} failed).")
     logger.info(results['ai_report'])
 
 if __name__ == "__main__":
+    # Classification worker processes re-enter here in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import os
+import mmap
+import struct
+import argparse
+from pathlib import Path
+from typing import Iterable, Optional
+from hasher import ALGORITHMS, DEFAULT_ALGORITHM, new_hasher, hash_file
+
+# Header: magic, algorithm name (NUL padded), record count.
+# Records follow: raw digest bytes + 8-byte big-endian size, sorted bytewise.
+MAGIC = b"ORGMAN01"
+_HEADER = struct.Struct(">8s16sQ")
+_SIZE = struct.Struct(">Q")
+
+class ManifestError(ValueError):
+    pass
+
+class HashManifest:
+    """
+    Read-only view of a sorted binary (digest, size) manifest, e.g. one exported by
+    backup tooling. The file is memory-mapped and searched in place, so opening a
+    100M-entry manifest costs one header read; lookups touch a handful of pages.
+    """
+    # Interpolation probes before falling back to plain bisection (guards skewed data)
+    MAX_INTERPOLATION_PROBES = 8
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.name = self.path.name
+        self._file = open(self.path, 'rb')
+        try:
+            magic, algorithm, count = _HEADER.unpack(self._file.read(_HEADER.size))
+        except struct.error:
+            self._file.close()
+            raise ManifestError(f"{self.path} is too short to be a manifest")
+        self.algorithm = algorithm.rstrip(b"\0").decode("ascii", "replace")
+        if magic != MAGIC or self.algorithm not in ALGORITHMS:
+            self._file.close()
+            raise ManifestError(f"{self.path} is not a manifest (or uses an unavailable algorithm '{self.algorithm}')")
+
+        self.digest_size = new_hasher(self.algorithm).digest_size
+        self.record_size = self.digest_size + _SIZE.size
+        self.count = count
+        if os.fstat(self._file.fileno()).st_size != _HEADER.size + count * self.record_size:
+            self._file.close()
+            raise ManifestError(f"{self.path} is truncated or corrupt")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if count else None
+
+    def _record(self, i: int) -> bytes:
+        start = _HEADER.size + i * self.record_size
+        return self._mm[start:start + self.record_size]
+
+    def _prefix(self, i: int) -> int:
+        start = _HEADER.size + i * self.record_size
+        return int.from_bytes(self._mm[start:start + 8], 'big')
+
+    def contains(self, file_hash: str, size: int) -> bool:
+        """file_hash is an 'algorithm:hex' digest; other algorithms never match."""
+        algorithm, _, hex_digest = file_hash.partition(":")
+        if algorithm != self.algorithm or not self.count:
+            return False
+        key = bytes.fromhex(hex_digest) + _SIZE.pack(size)
+
+        # Digests are uniformly distributed, so interpolating on the leading
+        # 8 bytes lands within a few records of the target
+        target = int.from_bytes(key[:8], 'big')
+        lo, hi = 0, self.count - 1
+        probes = 0
+        while lo <= hi:
+            lo_prefix, hi_prefix = self._prefix(lo), self._prefix(hi)
+            if target < lo_prefix or target > hi_prefix:
+                return False
+            if probes < self.MAX_INTERPOLATION_PROBES and hi_prefix > lo_prefix:
+                mid = lo + (target - lo_prefix) * (hi - lo) // (hi_prefix - lo_prefix)
+            else:
+                mid = (lo + hi) // 2
+            probes += 1
+
+            record = self._record(mid)
+            if record == key:
+                return True
+            if record < key:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return False
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+def write_manifest(path: Path, entries: Iterable[tuple[str, int]], algorithm: str = DEFAULT_ALGORITHM) -> int:
+    """Writes (file_hash, size) pairs as a sorted manifest. Returns the number of records."""
+    records = set()
+    for file_hash, size in entries:
+        name, _, hex_digest = file_hash.partition(":")
+        if name != algorithm:
+            raise ManifestError(f"Digest '{file_hash[:20]}...' is not {algorithm}")
+        records.add(bytes.fromhex(hex_digest) + _SIZE.pack(size))
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, algorithm.encode("ascii"), len(records)))
+        f.writelines(sorted(records))
+    return len(records)
+
+def open_manifests(paths: Iterable[Path]) -> list[HashManifest]:
+    return [HashManifest(p) for p in paths]
+
+def _build(out: Path, roots: list[Path], algorithm: str) -> int:
+    # Imported here so reading manifests doesn't pull in the scanner
+    from scanner import FileScanner
+
+    def entries():
+        for context in FileScanner(roots).scan():
+            try:
+                yield hash_file(context.path, context.size_bytes, algorithm), context.size_bytes
+            except OSError:
+                continue
+    return write_manifest(out, entries(), algorithm)
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Build a hash manifest of a backup tree")
+    parser.add_argument("output", type=Path, help="Manifest file to write")
+    parser.add_argument("paths", nargs="+", type=Path, help="Folders whose files are backed up")
+    parser.add_argument("--algorithm", default=DEFAULT_ALGORITHM, choices=sorted(ALGORITHMS))
+    args = parser.parse_args(argv)
+    count = _build(args.output, args.paths, args.algorithm)
+    print(f"Wrote {count} entries to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,19 @@ class FileContext:
     parent_folder: str
     file_hash: Optional[str] = None
     size_bytes: int = 0
+    # Stat data captured at scan time so later stages don't stat again
+    mtime_ns: int = 0
+    inode: int = 0
+    device: int = 0
+    # Compact id assigned by the deduplicator's index (-1 until then)
+    file_id: int = -1
+
+    @property
+    def mtime(self) -> float:
+        """Modification time in seconds, falling back to a stat if the scanner didn't record it."""
+        if self.mtime_ns:
+            return self.mtime_ns / 1e9
+        return self.path.stat().st_mtime
 
 @dataclass
 class ClassificationResult:
@@ -30,5 +43,11 @@ class ActionPlan:
     """A planned action for a file."""
     source: Path
     destination: Path
-    action_type: str  # 'MOVE', 'TRASH', 'SKIP'
-    reason: str
\ No newline at end of file
+    action_type: str  # 'MOVE', 'TRASH', 'LINK', 'SKIP'
+    reason: str
+    # Set by ActionExecutor once the file has actually been moved (after collision renaming)
+    final_path: Optional[Path] = None
+    # Known facts about the source, used to pick and verify the move strategy (0 / None = unknown)
+    size_bytes: int = 0
+    source_device: int = 0
+    source_hash: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,125 @@
+import logging
+from typing import Dict, List, Optional
+from models import FileContext
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:
+    # int.bit_count is Python 3.10+
+    def _popcount(x: int) -> int:
+        return bin(x).count("1")
+
+def is_available() -> bool:
+    """Near-duplicate detection needs Pillow to decode images; NumPy only speeds it up."""
+    return Image is not None
+
+def dhash(path, hash_size: int = 8) -> int:
+    """
+    Difference hash: the image is decoded at reduced size, shrunk to (hash_size+1) x hash_size
+    greyscale and each bit records whether a pixel is brighter than its right-hand neighbour.
+    Re-encoding, resizing and mild colour changes leave most bits unchanged.
+    """
+    with Image.open(path) as img:
+        # JPEG can decode straight to a fraction of full size, which skips most of the work
+        img.draft('L', (hash_size * 8, hash_size * 8))
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+
+        if np is not None:
+            pixels = np.asarray(small, dtype=np.int16)
+            bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+            return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+        data = list(small.getdata())
+
+    value = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = data[row * width + col]
+            right = data[row * width + col + 1]
+            value = (value << 1) | (right > left)
+    return value
+
+class NearDuplicateIndex:
+    """
+    Groups visually similar images by perceptual hash.
+    Lookups use multi-index hashing: the 64-bit hash is split into max_distance + 1
+    chunks, and by the pigeonhole principle any hash within max_distance bits agrees
+    exactly with at least one chunk. Only those bucket members are compared, so matching
+    stays far below quadratic even for hundreds of thousands of images.
+    """
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.chunks = max_distance + 1
+        self.chunk_bits = HASH_BITS // self.chunks
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        # One table per chunk: chunk value -> ids of images with that chunk
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(self.chunks)]
+        self.hashes: List[int] = []
+        self.contexts: List[FileContext] = []
+        # Union-find over image ids
+        self._parent: List[int] = []
+        self.failed = 0
+
+    def _chunk_values(self, value: int):
+        for i in range(self.chunks):
+            yield (value >> (i * self.chunk_bits)) & self.chunk_mask
+
+    def _find(self, i: int) -> int:
+        while self._parent[i] != i:
+            self._parent[i] = self._parent[self._parent[i]]
+            i = self._parent[i]
+        return i
+
+    def _union(self, a: int, b: int):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self._parent[max(ra, rb)] = min(ra, rb)
+
+    def add(self, context: FileContext) -> Optional[int]:
+        """Hashes the image now (before it may be moved) and links it to similar earlier images."""
+        try:
+            value = dhash(context.path)
+        except Exception as e:
+            # Corrupt, truncated or unsupported image formats
+            self.failed += 1
+            logger.debug(f"Perceptual hash failed for {context.path}: {e}")
+            return None
+
+        new_id = len(self.hashes)
+        self.hashes.append(value)
+        self.contexts.append(context)
+        self._parent.append(new_id)
+
+        checked = set()
+        for table, chunk in zip(self.tables, self._chunk_values(value)):
+            bucket = table.setdefault(chunk, [])
+            for other in bucket:
+                if other in checked:
+                    continue
+                checked.add(other)
+                if _popcount(self.hashes[other] ^ value) <= self.max_distance:
+                    self._union(new_id, other)
+            bucket.append(new_id)
+        return value
+
+    def groups(self) -> List[List[FileContext]]:
+        """Returns every group of two or more similar images, earliest file first."""
+        members: Dict[int, List[FileContext]] = {}
+        for i, context in enumerate(self.contexts):
+            members.setdefault(self._find(i), []).append(context)
+        return [g for g in members.values() if len(g) > 1]
@@ -0,0 +1,344 @@
+import os
+import zlib
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from models import FileContext, ActionPlan
+from domain_inference import ClassifierPool
+from logger import file_events
+from async_io import IOTimeout
+
+logger = logging.getLogger(__name__)
+
+# Holds the side effects (log records, result appends) of the file a thread is working on
+_local = threading.local()
+_DONE = object()
+
+def defer(fn, *args):
+    """Runs fn now, or inside a pipeline stage queues it until the file's results are replayed in order."""
+    effects = getattr(_local, "effects", None)
+    if effects is None:
+        fn(*args)
+    else:
+        effects.append((fn, args))
+
+@contextmanager
+def _capture(effects: Optional[list]):
+    """Collects deferred effects into `effects` for the duration; None runs them immediately."""
+    previous = getattr(_local, "effects", None)
+    _local.effects = effects
+    try:
+        yield effects
+    finally:
+        _local.effects = previous
+
+class _DeferLogs(logging.Filter):
+    """Handler filter that holds records logged inside a stage so they can be replayed in file order."""
+    def __init__(self, handler: logging.Handler):
+        super().__init__()
+        self.handler = handler
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        effects = getattr(_local, "effects", None)
+        if effects is None:
+            return True
+        effects.append((self.handler.handle, (record,)))
+        return False
+
+# --- Per-file stages, shared with the serial path in main.process_file ---
+
+def check_file(context: FileContext, deduplicator, ai_optimizer):
+    """Ordered stage before planning: dedup, backup check and space analysis. Returns (original, backed_up_in)."""
+    file_events("processing", "Processing: %s", context.filename)
+    original = deduplicator.find_duplicate(context)
+    backed_up_in = deduplicator.find_backup(context)
+    ai_optimizer.analyze(context)
+    return original, backed_up_in
+
+def finish_file(context: FileContext, plan: ActionPlan, deduplicator):
+    """Ordered stage after execution: point the context and indexes at where the file ended up."""
+    if plan.final_path:
+        # Keep the context pointing at the file so later dedup comparisons can still read it
+        context.path = plan.final_path
+        update_destination_index(deduplicator.dest_index, plan, context)
+        deduplicator.relocate(context)
+
+def update_destination_index(dest_index, plan, context):
+    """Keeps the destination content index in step with a completed move."""
+    if dest_index is None:
+        return
+    if dest_index.contains_path(plan.source):
+        dest_index.remove(plan.source)
+    if plan.action_type == 'MOVE':
+        try:
+            # Cross-device moves create a new inode; index what is actually on disk
+            st = os.stat(context.path)
+            context.inode, context.device, context.mtime_ns = st.st_ino, st.st_dev, st.st_mtime_ns
+        except OSError:
+            return
+        dest_index.add(context)
+
+class _ChunkResult:
+    """One file's share of a process-pool chunk, answering like a per-file future."""
+    def __init__(self, future, index: int):
+        self._future = future
+        self._index = index
+
+    def result(self):
+        group, path, score = self._future.result()[self._index]
+        return (group, path, score, []), []
+
+class OrganizerPipeline:
+    """
+    Runs files through bounded, overlapping stages:
+
+        scan -> [scan queue] -> classify pool -> [classify queue] -> ordered stage -> execute shards
+
+    The ordered stage (dedup, analysis, planning and post-move bookkeeping) runs on the
+    calling thread in scan order, so decisions match a serial run. Moves run on
+    `execute_workers` single-thread shards keyed by target folder (links share the trash
+    folder's shard, which they fall back to): name collisions in a
+    folder are resolved in file order, and different folders move concurrently.
+    Log records and results from the pools are held and replayed in file order.
+    With classify_in_processes, classification runs on a ClassifierPool in chunks of up
+    to `classify_chunk` files. With `io`, every move is bounded by its timeout.
+    Every queue is bounded by `queue_size`, so a slow stage stalls the ones before it.
+    """
+    def __init__(self, deduplicator, ai_optimizer, domain_engine, executor, classify_workers: int = 2,
+                 execute_workers: int = 2, classify_in_processes: bool = False, user_context: str = "",
+                 queue_size: int = 256, classify_chunk: int = 64, io: Callable = None):
+        self.deduplicator = deduplicator
+        self.ai_optimizer = ai_optimizer
+        self.domain_engine = domain_engine
+        self.executor = executor
+        self.classify_workers = max(1, classify_workers)
+        self.execute_workers = max(1, execute_workers)
+        self.classify_in_processes = classify_in_processes
+        self.user_context = user_context
+        self.queue_size = max(1, queue_size)
+        # Files per process-pool task
+        self.classify_chunk = max(1, classify_chunk)
+        # Optional io(op, fn, *args, retry=...) that moves run through (async_io.IOLimiter.call)
+        self.io = io
+        self._queues = {}
+        self._pending = deque()
+        # file_id -> (plan, future) of moves queued but not finished yet, for _wait_for_move
+        self._moving = {}
+        self._stop = threading.Event()
+        self._on_result = None
+        # Deepest each queue got, for tuning worker counts and queue_size
+        self.peak_depths = {"scan": 0, "classify": 0, "execute": 0}
+
+    def queue_depths(self) -> dict:
+        """Current depth of every stage queue; safe to poll from another thread."""
+        depths = {name: q.qsize() for name, q in self._queues.items()}
+        depths["execute"] = len(self._pending)
+        return depths
+
+    def run(self, contexts: Iterable[FileContext], on_result: Callable = None) -> int:
+        """
+        Processes every context; on_result(context, plan, done, domain, theme) is called
+        in scan order once each file is finished. Returns the number of files processed.
+        """
+        self._on_result = on_result
+        self._stop.clear()
+        scan_q = queue.Queue(self.queue_size)
+        classified_q = queue.Queue(self.queue_size)
+        self._queues = {"scan": scan_q, "classify": classified_q}
+
+        if self.classify_in_processes:
+            classify_pool = ClassifierPool(self.classify_workers, self.user_context)
+        else:
+            classify_pool = ThreadPoolExecutor(self.classify_workers, thread_name_prefix="classify")
+        shards = [ThreadPoolExecutor(1, thread_name_prefix=f"execute-{i}") for i in range(self.execute_workers)]
+        filters = [(h, _DeferLogs(h)) for h in logging.getLogger().handlers]
+        for handler, f in filters:
+            handler.addFilter(f)
+
+        stages = [
+            threading.Thread(target=self._scan_stage, args=(contexts, scan_q), name="pipeline-scan", daemon=True),
+            threading.Thread(target=self._classify_stage, args=(scan_q, classified_q, classify_pool),
+                             name="pipeline-classify", daemon=True),
+        ]
+        for t in stages:
+            t.start()
+
+        # Dedup reads earlier files; they must have landed wherever their moves put them
+        self.deduplicator.wait_for_move = self._wait_for_move
+        count = 0
+        try:
+            while True:
+                item = classified_q.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                context, classified = item
+                # The destination may live inside a source and be listed after files were moved into it
+                if context.path in self.executor.placed_paths:
+                    continue
+                count += 1
+                self._plan_and_submit(context, classified, shards)
+            self._drain()
+        finally:
+            self._stop.set()
+            self.deduplicator.wait_for_move = None
+            for shard in shards:
+                shard.shutdown(wait=True)
+            classify_pool.shutdown(wait=True, cancel_futures=True)
+            for t in stages:
+                t.join()
+            for handler, f in filters:
+                handler.removeFilter(f)
+        return count
+
+    def _put(self, q: queue.Queue, item, name: str = None) -> bool:
+        """Blocking put that gives up once the run is stopping."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            if name:
+                self.peak_depths[name] = max(self.peak_depths[name], q.qsize())
+            return True
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _scan_stage(self, contexts: Iterable[FileContext], scan_q: queue.Queue):
+        try:
+            for context in contexts:
+                if not self._put(scan_q, context, "scan"):
+                    return
+            self._put(scan_q, _DONE)
+        except BaseException as e:
+            self._put(scan_q, e)
+        finally:
+            # Lets a parallel scanner stop its workers if we quit early
+            close = getattr(contexts, "close", None)
+            if close:
+                close()
+
+    def _classify_stage(self, scan_q: queue.Queue, classified_q: queue.Queue, pool):
+        while True:
+            item = self._get(scan_q)
+            if item is _DONE or isinstance(item, BaseException):
+                self._put(classified_q, item)
+                return
+            batch, tail = [item], None
+            if self.classify_in_processes:
+                # Top the chunk up from what is already queued, but never wait: a slow scan
+                # should not hold back files that are ready
+                while len(batch) < self.classify_chunk:
+                    try:
+                        item = scan_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE or isinstance(item, BaseException):
+                        tail = item
+                        break
+                    batch.append(item)
+            try:
+                if self.classify_in_processes:
+                    chunk = pool.submit(batch)
+                    futures = [_ChunkResult(chunk, i) for i in range(len(batch))]
+                else:
+                    futures = [pool.submit(self._classify, batch[0])]
+            except RuntimeError as e:
+                # Pool shut down underneath us: the run is already failing
+                self._put(classified_q, e)
+                return
+            # Futures are queued in scan order; the ordered stage waits on each in turn
+            for context, future in zip(batch, futures):
+                if not self._put(classified_q, (context, future), "classify"):
+                    return
+            if tail is not None:
+                self._put(classified_q, tail)
+                return
+
+    def _classify(self, context: FileContext):
+        with _capture([]) as effects:
+            result = self.domain_engine.infer_domain_and_theme(context)
+        return result, effects
+
+    def _execute(self, plan: ActionPlan):
+        if self.io is None:
+            return self._execute_captured(plan)
+        try:
+            # Not retried: a move that timed out may still complete
+            return self.io("move", self._execute_captured, plan, retry=False)
+        except IOTimeout as e:
+            # The run waits for it before closing the journal, which records whether it landed
+            return False, [(logger.error, (f"Gave up waiting for the move of {plan.source}: {e}",))]
+        except OSError as e:
+            return False, [(logger.error, (f"Gave up moving {plan.source}: {e}",))]
+
+    def _execute_captured(self, plan: ActionPlan):
+        with _capture([]) as effects:
+            done = self.executor.execute(plan)
+        return done, effects
+
+    def _plan_and_submit(self, context: FileContext, classified, shards):
+        with _capture([]) as effects:
+            original, backed_up_in = check_file(context, self.deduplicator, self.ai_optimizer)
+            (domain, theme, _score, _reasons), classify_effects = classified.result()
+            effects.extend(classify_effects)
+            plan = self.executor.create_plan(
+                source=context.path,
+                domain=domain,
+                theme=theme,
+                is_duplicate=original is not None,
+                duplicate_of=original,
+                backed_up_in=backed_up_in,
+                context=context
+            )
+
+        shard = shards[zlib.crc32(str(self.executor.target_dir(plan)).encode()) % len(shards)]
+        future = shard.submit(self._execute, plan)
+        self._pending.append((context, plan, domain, theme, effects, future))
+        if context.file_id >= 0:
+            self._moving[context.file_id] = (plan, future)
+        self.peak_depths["execute"] = max(self.peak_depths["execute"], len(self._pending))
+
+        while self._pending and self._pending[0][-1].done():
+            self._finish_next()
+        while len(self._pending) >= self.queue_size:
+            self._finish_next()
+
+    def _finish_next(self):
+        context, plan, domain, theme, effects, future = self._pending.popleft()
+        self._moving.pop(context.file_id, None)
+        done, execute_effects = future.result()
+        with _capture(None):
+            for fn, args in effects + execute_effects:
+                fn(*args)
+            finish_file(context, plan, self.deduplicator)
+            if self._on_result:
+                self._on_result(context, plan, done, domain, theme)
+
+    def _wait_for_move(self, file_id: int) -> Optional[Path]:
+        """
+        Waits for the queued move of one earlier file only and returns where it landed
+        (None if it isn't queued or didn't move). Later stages still finish in order.
+        """
+        if file_id not in self._moving:
+            return None
+        plan, future = self._moving[file_id]
+        future.result()
+        return plan.final_path
+
+    def _drain(self):
+        while self._pending:
+            self._finish_next()
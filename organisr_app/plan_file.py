@@ -0,0 +1,111 @@
+import os
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+from models import FileContext, ActionPlan
+
+PLAN_VERSION = 1
+# Where the GUI keeps plans from dry runs
+PLAN_DIR = Path.home() / ".organisr" / "plans"
+
+class PlanFormatError(ValueError):
+    pass
+
+class PlanWriter:
+    """
+    Streams plans to a JSONL file as they are made: one header line, then one line per
+    file. Each record carries the source's stat fingerprint (size, mtime_ns, inode) so
+    applying the plan later can tell, without reading, whether the file changed since.
+
+        {"plan": 1, "created": ..., "sources": [...], "dest": ..., "dedup_mode": ...}
+        {"action": "MOVE", "src": ..., "dst": ..., "reason": ..., "fp": [size, mtime_ns, inode], "hash": ...}
+    """
+    def __init__(self, path: Path, source_dirs, dest_dir: Path, dedup_mode: str = 'trash'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self.count = 0
+        self._write({
+            "plan": PLAN_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "sources": [str(p) for p in source_dirs],
+            "dest": str(dest_dir),
+            "dedup_mode": dedup_mode,
+        })
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+
+    def add(self, plan: ActionPlan, context: FileContext):
+        record = {
+            "action": plan.action_type,
+            "src": str(plan.source),
+            "dst": str(plan.destination),
+            "reason": plan.reason,
+            "fp": [context.size_bytes, context.mtime_ns, context.inode],
+        }
+        if plan.source_hash:
+            # Lets the apply step verify cross-device copies without reading the source twice
+            record["hash"] = plan.source_hash
+        self._write(record)
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+def new_plan_path() -> Path:
+    return PLAN_DIR / f"plan-{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.jsonl"
+
+def read_plan(path: Path) -> tuple[dict, Iterator[dict]]:
+    """Returns (header, records). Records are read lazily, so plans of any size stream."""
+    f = open(path, 'r', encoding='utf-8')
+    try:
+        header = json.loads(f.readline() or "null")
+    except json.JSONDecodeError:
+        header = None
+    if not isinstance(header, dict) or header.get("plan") != PLAN_VERSION:
+        f.close()
+        raise PlanFormatError(f"{path} is not an organiser plan file (version {PLAN_VERSION})")
+
+    def records():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    return header, records()
+
+def count_plan_records(path: Path) -> int:
+    """Number of plans in a plan file, counted from its line breaks without parsing."""
+    lines = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            lines += chunk.count(b"\n")
+    # Less the header
+    return max(0, lines - 1)
+
+def plan_from_record(record: dict, st: os.stat_result = None) -> ActionPlan:
+    return ActionPlan(
+        source=Path(record["src"]),
+        destination=Path(record["dst"]),
+        action_type=record["action"],
+        reason=record["reason"],
+        size_bytes=record["fp"][0],
+        source_device=st.st_dev if st else 0,
+        source_hash=record.get("hash"),
+    )
+
+def source_unchanged(record: dict) -> Optional[os.stat_result]:
+    """Returns the source's current stat if it still matches the planned fingerprint, else None."""
+    size, mtime_ns, inode = record["fp"]
+    try:
+        st = os.lstat(record["src"])
+    except OSError:
+        return None
+    if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+        return None
+    # Some filesystems (and Windows scandir) report no inode number
+    if inode and st.st_ino != inode:
+        return None
+    return st
@@ -0,0 +1,213 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Generator, Iterable, Optional, Tuple
+from models import FileContext
+from scanner import FileScanner
+from config import PROGRESS_INTERVAL, PROGRESS_SAMPLE_PROBES, PROGRESS_SAMPLE_SECONDS, PROGRESS_SAMPLE_DIRS
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ProgressEvent:
+    """A snapshot of a run, passed to the progress callback of run_organizer_logic / apply_plan."""
+    # 'counting' (sampling the sources for an estimate), 'running' or 'done'
+    phase: str
+    files_discovered: int = 0
+    bytes_discovered: int = 0
+    files_processed: int = 0
+    bytes_processed: int = 0
+    # The pre-count estimate, raised to what was discovered; exact once discovery has finished
+    files_total: int = 0
+    bytes_total: int = 0
+    discovery_done: bool = False
+    # Per stage ('discover', 'process'): (files per second, bytes per second), smoothed
+    rates: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    elapsed: float = 0.0
+    eta_seconds: Optional[float] = None
+
+    @property
+    def fraction(self) -> float:
+        if self.phase == 'done':
+            return 1.0
+        return min(1.0, self.files_processed / self.files_total) if self.files_total else 0.0
+
+    def describe(self) -> str:
+        if self.phase == 'counting':
+            return "Estimating the size of the sources..."
+        total = f"{self.files_total}" if self.discovery_done else f"~{self.files_total}"
+        text = (f"{self.files_processed}/{total} files ({self.fraction:.0%}), "
+                f"{self.bytes_processed / 1024 / 1024:.1f} MB, "
+                f"{self.rates.get('process', (0.0, 0.0))[0]:.0f} files/s")
+        if self.eta_seconds is not None and self.phase != 'done':
+            minutes, seconds = divmod(int(self.eta_seconds), 60)
+            text += f", ETA {minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+        return text
+
+def estimate_tree(roots: Iterable[Path], probes: int = PROGRESS_SAMPLE_PROBES, budget: float = PROGRESS_SAMPLE_SECONDS,
+                  max_dirs: int = PROGRESS_SAMPLE_DIRS, seed: int = 0) -> Tuple[int, int, bool]:
+    """
+    Estimates the files and bytes under roots without walking all of them. The top of
+    the tree is listed breadth-first, up to max_dirs folders or half the time budget;
+    if that finishes the walk the count is exact. Otherwise the folders still waiting
+    are sampled: each probe picks one at random and descends from it through one
+    random subfolder per level. Each level's count is weighted by the product of the
+    branching factors above it (Knuth's tree-size estimator). Listings are cached,
+    so repeated probes mostly pay only for the levels not yet seen.
+    Returns (files, bytes, exact).
+    """
+    # Same filters as the real walk (ignored names, hidden folders, symlinks)
+    lister = FileScanner([])
+    rng = random.Random(seed)
+    listings: Dict[str, Tuple[int, int, list]] = {}
+
+    def listing(dirpath: str):
+        if dirpath not in listings:
+            contexts, subdirs = lister._list_dir(dirpath)
+            listings[dirpath] = (len(contexts), sum(c.size_bytes for c in contexts), subdirs)
+        return listings[dirpath]
+
+    start = time.monotonic()
+    pending = deque(str(p) for p in roots if os.path.isdir(p))
+    files = size = 0
+    while pending and len(listings) < max_dirs and time.monotonic() - start < budget / 2:
+        f, b, subdirs = listing(pending.popleft())
+        files += f
+        size += b
+        pending.extend(subdirs)
+    if not pending:
+        return files, size, True
+
+    frontier = list(pending)
+    sum_files = sum_bytes = 0.0
+    n = 0
+    while n < probes and (n == 0 or time.monotonic() - start < budget):
+        weight = 1
+        dirpath = rng.choice(frontier)
+        while True:
+            f, b, subdirs = listing(dirpath)
+            sum_files += weight * f
+            sum_bytes += weight * b
+            if not subdirs:
+                break
+            weight *= len(subdirs)
+            dirpath = rng.choice(subdirs)
+        n += 1
+    scale = len(frontier) / n
+    return files + int(sum_files * scale), size + int(sum_bytes * scale), False
+
+class ProgressTracker:
+    """
+    Counts files as they are discovered and processed and hands a ProgressEvent to
+    `callback` at most every `interval` seconds, from the thread that processes files.
+    Rates are smoothed over those intervals; the ETA divides the files still to do by
+    the processing rate. On incremental runs `skipped` returns how many files the scan
+    passed over as unchanged; the estimate counts them, so they count as done too.
+    """
+    # Weight of the newest interval in the smoothed rates
+    SMOOTHING = 0.3
+
+    def __init__(self, callback: Callable[[ProgressEvent], None], interval: float = PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.files_estimate = 0
+        self.bytes_estimate = 0
+        self.files_discovered = 0
+        self.bytes_discovered = 0
+        self.files_processed = 0
+        self.bytes_processed = 0
+        self.discovery_done = False
+        self.skipped: Optional[Callable[[], int]] = None
+        self._start = time.monotonic()
+        self._last_emit = self._start
+        self._last = {"discover": (0, 0), "process": (0, 0)}
+        self.rates = {"discover": (0.0, 0.0), "process": (0.0, 0.0)}
+        # Discovery runs on the scan stage's thread under the pipeline
+        self._lock = threading.Lock()
+
+    def count(self, roots: Iterable[Path]):
+        """Pre-counts the sources (sampled) so the first events already have a total."""
+        self._emit('counting')
+        files, size, exact = estimate_tree(roots)
+        self.set_estimate(files, size)
+        logger.info(f"Sources hold {'' if exact else 'about '}{files} files ({size / 1024 / 1024:.1f} MB).")
+
+    def set_estimate(self, files: int, size: int = 0):
+        self.files_estimate = files
+        self.bytes_estimate = size
+
+    def found(self, size: int = 0):
+        with self._lock:
+            self.files_discovered += 1
+            self.bytes_discovered += size
+
+    def discover(self, contexts: Iterable[FileContext]) -> Generator[FileContext, None, None]:
+        """Passes the scanner's output through, counting it; marks discovery done at the end."""
+        for context in contexts:
+            self.found(context.size_bytes)
+            yield context
+        self.discovery_done = True
+
+    def processed(self, size: int = 0):
+        self.files_processed += 1
+        self.bytes_processed += size
+        now = time.monotonic()
+        if self.files_processed == 1:
+            # Rates are measured from the first file done, past any start-up work
+            self._last_emit = now
+        elif now - self._last_emit >= self.interval:
+            self._emit('running')
+
+    def finish(self):
+        self.discovery_done = True
+        self._emit('done')
+
+    def _emit(self, phase: str):
+        now = time.monotonic()
+        dt = now - self._last_emit
+        skipped = self.skipped() if self.skipped else 0
+        with self._lock:
+            current = {"discover": (self.files_discovered + skipped, self.bytes_discovered),
+                       "process": (self.files_processed + skipped, self.bytes_processed)}
+        if dt > 0 and phase == 'running':
+            for stage, (files, size) in current.items():
+                last_files, last_bytes = self._last[stage]
+                rate_files, rate_bytes = self.rates[stage]
+                a = self.SMOOTHING if rate_files else 1.0
+                self.rates[stage] = (rate_files + a * ((files - last_files) / dt - rate_files),
+                                     rate_bytes + a * ((size - last_bytes) / dt - rate_bytes))
+        self._last = current
+        self._last_emit = now
+
+        discovered, discovered_bytes = current["discover"]
+        if self.discovery_done:
+            files_total, bytes_total = discovered, discovered_bytes
+        else:
+            files_total = max(self.files_estimate, discovered)
+            bytes_total = max(self.bytes_estimate, discovered_bytes)
+        processed, processed_bytes = current["process"]
+        rate = self.rates["process"][0]
+        eta = max(0, files_total - processed) / rate if rate > 0 else None
+        event = ProgressEvent(
+            phase=phase,
+            files_discovered=discovered,
+            bytes_discovered=discovered_bytes,
+            files_processed=processed,
+            bytes_processed=processed_bytes,
+            files_total=files_total,
+            bytes_total=bytes_total,
+            discovery_done=self.discovery_done,
+            rates=dict(self.rates),
+            elapsed=now - self._start,
+            eta_seconds=0.0 if phase == 'done' else eta,
+        )
+        try:
+            self.callback(event)
+        except Exception as e:
+            # A broken progress display must not stop the run
+            logger.warning(f"Progress callback failed: {e}")
@@ -0,0 +1,129 @@
+import csv
+import json
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+from models import FileContext, ActionPlan
+
+REPORT_DIR = Path.home() / ".organisr" / "reports"
+REPORT_FORMATS = ('jsonl', 'csv')
+
+# Columns of each report, in CSV order
+_FIELDS = {
+    "actions": ("action", "ok", "source", "destination", "reason", "size"),
+    "proposals": ("kind", "path", "size", "group"),
+    "folders": ("kind", "path"),
+}
+
+class ResultsSink:
+    """
+    Streams what a run did to report files as it happens, so a run over millions of
+    files keeps only counters in memory. One folder per run holds:
+
+        actions.<fmt>     one row per file: action, ok, source, destination, reason, size
+        proposals.<fmt>   space-audit findings: kind, path, size, group (near-duplicate set)
+        folders.<fmt>     folders the run created, and folders it left empty
+        summary.json      the counters, written by close()
+
+    fmt is 'jsonl' (one object per line) or 'csv' (with a header row).
+    """
+    def __init__(self, directory: Path, fmt: str = 'jsonl'):
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format '{fmt}'. Expected one of: {', '.join(REPORT_FORMATS)}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.paths = {name: self.directory / f"{name}.{fmt}" for name in _FIELDS}
+        self.paths["summary"] = self.directory / "summary.json"
+        self._files = {}
+        self._writers = {}
+        for name, fields in _FIELDS.items():
+            f = open(self.paths[name], 'w', encoding='utf-8', newline='')
+            self._files[name] = f
+            if fmt == 'csv':
+                writer = csv.writer(f)
+                writer.writerow(fields)
+                self._writers[name] = writer
+        # Moves are recorded from the execute shards and the ordered stage alike
+        self._lock = threading.Lock()
+        self.actions = Counter()
+        self.failed = 0
+        self.bytes_moved = 0
+        self.proposals = Counter()
+        self.proposal_bytes = Counter()
+        self.folders = Counter()
+
+    def _write(self, name: str, record: dict):
+        with self._lock:
+            if self.fmt == 'csv':
+                self._writers[name].writerow(record.get(field, "") for field in _FIELDS[name])
+            else:
+                self._files[name].write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def action(self, plan: ActionPlan, ok: bool, size: int = 0):
+        destination = plan.final_path or plan.destination
+        self._write("actions", {
+            "action": plan.action_type, "ok": ok, "source": str(plan.source),
+            "destination": str(destination), "reason": plan.reason, "size": size,
+        })
+        with self._lock:
+            if ok:
+                self.actions[plan.action_type] += 1
+                if plan.action_type in ('MOVE', 'TRASH'):
+                    self.bytes_moved += size
+            else:
+                self.failed += 1
+
+    def proposal(self, kind: str, context: FileContext, group: Optional[int] = None):
+        record = {"kind": kind, "path": str(context.path), "size": context.size_bytes}
+        if group is not None:
+            record["group"] = group
+        self._write("proposals", record)
+        with self._lock:
+            self.proposals[kind] += 1
+            self.proposal_bytes[kind] += context.size_bytes
+
+    def folder(self, kind: str, path):
+        """kind is 'created' or 'empty'."""
+        self._write("folders", {"kind": kind, "path": str(path)})
+        with self._lock:
+            self.folders[kind] += 1
+
+    def summary(self) -> dict:
+        return {
+            "actions": dict(self.actions),
+            "failed": self.failed,
+            "bytes_moved": self.bytes_moved,
+            "proposals": dict(self.proposals),
+            "proposal_bytes": dict(self.proposal_bytes),
+            "folders": dict(self.folders),
+        }
+
+    def close(self, extra: dict = None) -> dict:
+        """Closes the reports and writes summary.json (the counters plus `extra`). Returns the paths."""
+        for f in self._files.values():
+            f.close()
+        with open(self.paths["summary"], 'w', encoding='utf-8') as f:
+            json.dump({**self.summary(), **(extra or {})}, f, indent=2, default=str)
+        return {name: str(p) for name, p in self.paths.items()}
+
+def new_report_dir() -> Path:
+    base = REPORT_DIR / datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    path, n = base, 1
+    while path.exists():
+        path = base.with_name(f"{base.name}-{n}")
+        n += 1
+    return path
+
+def read_report(path: Path) -> Iterator[dict]:
+    """Streams the records of a JSONL or CSV report (CSV values come back as strings)."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
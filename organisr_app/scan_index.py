@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+from models import FileContext
+
+INDEX_PATH = Path.home() / ".organisr" / "scan_index.db"
+
+class ScanIndex:
+    """
+    Persistent record of what previous runs already processed.
+    Files are matched on (size, mtime_ns, inode); directories on their mtime,
+    which changes whenever an entry is added, removed or renamed inside them.
+    Note: a file edited in place inside an otherwise untouched directory does not
+    change the directory mtime, so it is only picked up by a full (non-incremental) run.
+    """
+    BATCH_SIZE = 5000
+    # Stored mtime of a directory that must be listed again next run
+    RESCAN = -1
+
+    def __init__(self, db_path: Path = INDEX_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # The parallel scanner reads from worker threads, so access is serialised by a lock
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                file_hash TEXT,
+                domain TEXT,
+                theme TEXT
+            );
+            CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+        """)
+
+        # Writes are buffered; directory mtimes are only persisted by commit() at the end
+        # of a successful run so a crash never marks unprocessed directories as done.
+        self._pending_files = []
+        # Deletions are only applied by commit(), so a dry run never changes the index
+        self._pending_forgets = set()
+        self._pending_dirs = {}
+        # dir -> files yielded from it that have not been recorded or moved yet
+        self._unresolved = {}
+
+    # --- Lookups (called by FileScanner) ---
+
+    def dir_unchanged(self, dirpath: str, mtime_ns: int) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (dirpath,)).fetchone()
+        return row is not None and row[0] == mtime_ns
+
+    def file_count(self, dirpath: str) -> int:
+        """Files recorded in a directory, for counting the ones an unchanged directory holds."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files WHERE dir = ?", (dirpath,)).fetchone()[0]
+
+    def child_dirs(self, dirpath: str) -> list[str]:
+        """Known subdirectories of an unchanged directory, so the walk can continue without listing it."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (dirpath,)).fetchall()
+        return [r[0] for r in rows]
+
+    def file_unchanged(self, context: FileContext) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode FROM files WHERE path = ?", (str(context.path),)
+            ).fetchone()
+        return row is not None and row == (context.size_bytes, context.mtime_ns, context.inode)
+
+    def get_record(self, path: Path) -> Optional[dict]:
+        """Returns the stored stat data, hash and last classification for a file."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, file_hash, domain, theme FROM files WHERE path = ?", (str(path),)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("size", "mtime_ns", "inode", "file_hash", "domain", "theme"), row))
+
+    # --- Updates ---
+
+    def stage_dir(self, dirpath: str, mtime_ns: int, present_names: set[str], yielded: int):
+        """
+        Records a freshly listed directory and drops index rows for files no longer in it.
+        `yielded` is the number of new or modified files handed to the pipeline; the
+        directory is only marked unchanged once every one of them has been resolved.
+        """
+        with self._lock:
+            self._pending_dirs[dirpath] = (os.path.dirname(dirpath), mtime_ns)
+            if yielded:
+                self._unresolved[dirpath] = yielded
+            rows = self._conn.execute("SELECT path FROM files WHERE dir = ?", (dirpath,)).fetchall()
+        for (path,) in rows:
+            if os.path.basename(path) not in present_names:
+                self.forget(Path(path))
+
+    def record_file(self, context: FileContext, domain: str = None, theme: str = None):
+        """Marks a file that stays where it is as processed, along with its hash and classification."""
+        with self._lock:
+            self._pending_files.append((
+                str(context.path), str(context.path.parent), context.size_bytes,
+                context.mtime_ns, context.inode, context.file_hash, domain, theme
+            ))
+            self._pending_forgets.discard(str(context.path))
+            self._resolve(str(context.path.parent))
+        if len(self._pending_files) >= self.BATCH_SIZE:
+            self._flush()
+
+    def mark_moved(self, path: Path):
+        """Marks a file that was moved out of its source directory."""
+        with self._lock:
+            self._resolve(str(path.parent))
+        self.forget(path)
+
+    def forget(self, path: Path):
+        with self._lock:
+            self._pending_forgets.add(str(path))
+
+    def _resolve(self, dirpath: str):
+        remaining = self._unresolved.get(dirpath)
+        if remaining is None:
+            return
+        if remaining <= 1:
+            del self._unresolved[dirpath]
+        else:
+            self._unresolved[dirpath] = remaining - 1
+
+    def _flush(self):
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._pending_files)
+            self._pending_files.clear()
+
+    def commit(self):
+        """
+        Persists buffered file records, deletions and the directory mtimes seen during this run.
+        Directories with files that failed to move are stored with an mtime that never
+        matches: they stay listed under their parent (an unchanged parent is not listed
+        again, only descended through) and are always rescanned.
+        """
+        self._flush()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in self._pending_forgets))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)",
+                    [(path, parent, self.RESCAN if path in self._unresolved else mtime)
+                     for path, (parent, mtime) in self._pending_dirs.items()]
+                )
+            self._pending_forgets.clear()
+            self._pending_dirs.clear()
+            self._unresolved.clear()
+
+    def close(self):
+        """Closes the database, discarding anything not yet committed (used for dry runs)."""
+        self._conn.close()
@@ -1,51 +1,314 @@
 import os
-import hashlib
+import stat
+import queue
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Generator
+from typing import Callable, Generator, Optional
 from models import FileContext
+from hasher import hash_file, DEFAULT_ALGORITHM
+from scan_index import ScanIndex
 from taxonomy import IGNORED_DIRS, IGNORED_FILES
+from config import ORDERED_SCAN_LOOKAHEAD
+
+class _LookAhead:
+    """
+    Shared by an ordered merge and its walkers. The merge publishes how many listings
+    it holds out of order and which folder it needs next; once `limit` are held, the
+    walkers only take that folder (via claim) and everything else waits. (Listings
+    already queued for the merge still arrive, so it can hold up to the queue's size
+    more.) The needed
+    folder's parent has already been merged, so it is always queued, being listed or
+    already delivered: the walk never stalls.
+    """
+    def __init__(self, limit: int = ORDERED_SCAN_LOOKAHEAD):
+        self.limit = max(1, limit)
+        self.buffered = 0
+        self.want: Optional[str] = None
+        # Set by the walk: wakes walkers waiting for work
+        self.wake: Callable[[], None] = lambda: None
+
+    def throttled(self) -> bool:
+        return self.buffered >= self.limit
+
+    def held(self, n: int):
+        """The merge now holds n listings; walkers held back resume once it drops below the limit."""
+        was_throttled = self.throttled()
+        self.buffered = n
+        if was_throttled and not self.throttled():
+            self.wake()
+
+    def claim(self, queues) -> Optional[str]:
+        """Removes the folder the merge needs from whichever walker queue holds it."""
+        want = self.want
+        if want is None:
+            return None
+        for q in queues:
+            try:
+                q.remove(want)
+                return want
+            except ValueError:
+                continue
+        return None
 
 class FileScanner:
-    def __init__(self, root_paths: list[Path]):
+    def __init__(self, root_paths: list[Path], workers: int = 1, ordered: bool = False, index: ScanIndex = None,
+                 listed: Callable[[str, int, list[str]], None] = None):
         self.root_paths = root_paths
+        # workers > 1 switches to the parallel, work-stealing traversal
+        self.workers = max(1, workers)
+        # Only meaningful in parallel mode; the serial walk is always depth-first
+        self.ordered = ordered
+        # Incremental mode: only new or modified files are yielded
+        self.index = index
+        # Called with (folder, number of entries, subdirectories) for every folder listed
+        self.listed = listed
+        self.unchanged_files = 0
+        self.unchanged_dirs = 0
+        self._stats_lock = threading.Lock()
 
     def scan(self) -> Generator[FileContext, None, None]:
         """Recursively scans directories and yields FileContext objects."""
-        for root_path in self.root_paths:
-            if not root_path.exists():
-                continue
+        roots = [str(p) for p in self.root_paths if p.exists()]
+
+        if self.workers > 1:
+            yield from self._scan_parallel(roots)
+            return
+
+        for root in roots:
+            yield from self._scan_dir(root)
+
+    def _scan_dir(self, dirpath: str) -> Generator[FileContext, None, None]:
+        """Serial depth-first walk."""
+        contexts, subdirs = self._list_dir(dirpath)
+        yield from contexts
 
-            for dirpath, dirnames, filenames in os.walk(root_path):
-                # Modify dirnames in-place to skip ignored directories
-                dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith('.')]
-                
-                for f in filenames:
-                    if f in IGNORED_FILES or f.startswith('.'):
+        for subdir in subdirs:
+            yield from self._scan_dir(subdir)
+
+    def _list_dir(self, dirpath: str) -> tuple[list[FileContext], list[str]]:
+        """
+        Lists a single directory with os.scandir.
+        Symlink status, size, mtime and inode come from the DirEntry cache,
+        so each file costs at most one lstat instead of several.
+        Returns (file contexts, subdirectories to descend into).
+        """
+        contexts = []
+        subdirs = []
+        dir_mtime_ns = 0
+        try:
+            if self.index is not None:
+                dir_mtime_ns = os.stat(dirpath).st_mtime_ns
+                if self.index.dir_unchanged(dirpath, dir_mtime_ns):
+                    # Nothing was added, removed or renamed here; only descend
+                    skipped = self.index.file_count(dirpath)
+                    with self._stats_lock:
+                        self.unchanged_dirs += 1
+                        self.unchanged_files += skipped
+                    return contexts, self.index.child_dirs(dirpath)
+            entries = os.scandir(dirpath)
+        except OSError:
+            # Permission errors or directory vanished
+            return contexts, subdirs
+
+        parent_folder = os.path.basename(dirpath)
+        total = 0
+        with entries:
+            for entry in entries:
+                total += 1
+                name = entry.name
+                try:
+                    # Skip symlinks to avoid loops (d_type answers this without a syscall)
+                    if entry.is_symlink():
                         continue
 
-                    full_path = Path(dirpath) / f
-                    
-                    # Skip symlinks to avoid loops
-                    if full_path.is_symlink():
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in IGNORED_DIRS and not name.startswith('.'):
+                            subdirs.append(entry.path)
                         continue
 
-                    try:
-                        yield FileContext(
-                            path=full_path,
-                            filename=f,
-                            extension=full_path.suffix,
-                            parent_folder=Path(dirpath).name,
-                            size_bytes=full_path.stat().st_size
-                        )
-                    except OSError:
-                        # Permission errors or file vanished
+                    if name in IGNORED_FILES or name.startswith('.'):
                         continue
 
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    # Permission errors or file vanished
+                    continue
+
+                contexts.append(FileContext(
+                    path=Path(entry.path),
+                    filename=name,
+                    extension=os.path.splitext(name)[1],
+                    parent_folder=parent_folder,
+                    size_bytes=st.st_size,
+                    mtime_ns=st.st_mtime_ns,
+                    inode=st.st_ino,
+                    device=st.st_dev
+                ))
+
+        if self.listed:
+            self.listed(dirpath, total, subdirs)
+
+        if self.index is not None:
+            present = {c.filename for c in contexts}
+            contexts = [c for c in contexts if not self.index.file_unchanged(c)]
+            with self._stats_lock:
+                self.unchanged_files += len(present) - len(contexts)
+            self.index.stage_dir(dirpath, dir_mtime_ns, present, len(contexts))
+
+        return contexts, subdirs
+
+    @staticmethod
+    def context_for(path: Path) -> Optional[FileContext]:
+        """
+        Builds a FileContext for a single file outside of a walk (used by the watch daemon).
+        Returns None for ignored names, symlinks, non-regular files and files that vanished.
+        """
+        name = path.name
+        if name in IGNORED_FILES or name.startswith('.'):
+            return None
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        return FileContext(
+            path=path,
+            filename=name,
+            extension=path.suffix,
+            parent_folder=path.parent.name,
+            size_bytes=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            inode=st.st_ino,
+            device=st.st_dev
+        )
+
+    def _scan_parallel(self, roots: list[str]) -> Generator[FileContext, None, None]:
+        """
+        Shards directories across a pool of threads.
+        Each worker owns a deque: it pushes the subdirectories it discovers and pops
+        them LIFO (depth-first, cache friendly); an idle worker steals the oldest
+        directory from another worker's deque, which tends to be the biggest subtree.
+        Listings are funnelled back through a bounded queue so a slow consumer
+        applies backpressure to the walkers.
+        """
+        if not roots:
+            return
+
+        deques = [deque() for _ in range(self.workers)]
+        for i, root in enumerate(roots):
+            deques[i % self.workers].append(root)
+
+        results = queue.Queue(maxsize=self.workers * 64)
+        work_ready = threading.Condition()
+        stop = threading.Event()
+        state = {"pending": len(roots)}
+        ahead = _LookAhead() if self.ordered else None
+        if ahead:
+            def wake():
+                with work_ready:
+                    work_ready.notify_all()
+            ahead.wake = wake
+
+        def take(index: int):
+            if ahead and ahead.throttled():
+                return ahead.claim(deques)
+            try:
+                return deques[index].pop()
+            except IndexError:
+                pass
+            # Steal from the other end of a victim's deque
+            for offset in range(1, self.workers):
+                try:
+                    return deques[(index + offset) % self.workers].popleft()
+                except IndexError:
+                    continue
+            return None
+
+        def publish(item):
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def worker(index: int):
+            while not stop.is_set():
+                dirpath = take(index)
+                if dirpath is None:
+                    with work_ready:
+                        if state["pending"] == 0:
+                            return
+                        work_ready.wait(timeout=0.05)
+                    continue
+
+                contexts, subdirs = self._list_dir(dirpath)
+                if subdirs:
+                    with work_ready:
+                        state["pending"] += len(subdirs)
+                        # Reversed so the LIFO pop visits subdirectories in listing order
+                        deques[index].extend(reversed(subdirs))
+                        work_ready.notify_all()
+
+                publish((dirpath, contexts, subdirs))
+
+                with work_ready:
+                    state["pending"] -= 1
+                    finished = state["pending"] == 0
+                    if finished:
+                        work_ready.notify_all()
+                if finished:
+                    # Every listing was published before its pending count dropped
+                    publish(None)
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(self.workers)]
+        for t in threads:
+            t.start()
+
+        try:
+            if self.ordered:
+                yield from self._merge_ordered(roots, results, ahead)
+            else:
+                while (item := results.get()) is not None:
+                    yield from item[1]
+        finally:
+            # Also reached when the consumer abandons the generator early
+            stop.set()
+            for t in threads:
+                t.join()
+
+    @staticmethod
+    def _merge_ordered(roots: list[str], results: queue.Queue, ahead: _LookAhead = None) -> Generator[FileContext, None, None]:
+        """
+        Replays parallel listings in the same depth-first order as the serial walk.
+        Listings that arrive early are held; `ahead` caps how many (see _LookAhead).
+        """
+        listings = {}
+        stack = list(reversed(roots))
+        while stack:
+            dirpath = stack.pop()
+            if ahead:
+                ahead.want = dirpath
+            while dirpath not in listings:
+                if ahead and ahead.throttled():
+                    ahead.wake()
+                item = results.get()
+                if item is None:
+                    return
+                listings[item[0]] = item[1:]
+                if ahead:
+                    ahead.held(len(listings))
+
+            contexts, subdirs = listings.pop(dirpath)
+            if ahead:
+                ahead.held(len(listings))
+            yield from contexts
+            stack.extend(reversed(subdirs))
+
     @staticmethod
-    def calculate_hash(path: Path, chunk_size: int = 8192) -> str:
-        """Calculates SHA-256 hash of a file."""
-        sha256 = hashlib.sha256()
-        with open(path, 'rb') as f:
-            while chunk := f.read(chunk_size):
-                sha256.update(chunk)
-        return sha256.hexdigest()
\ No newline at end of file
+    def calculate_hash(path: Path, algorithm: str = DEFAULT_ALGORITHM) -> str:
+        """Calculates the content digest of a file, prefixed with the algorithm name."""
+        return hash_file(path, algorithm=algorithm)
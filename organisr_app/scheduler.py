@@ -8,13 +8,13 @@ def schedule_weekly_task():
     
     # Determine executable path
     if getattr(sys, 'frozen', False):
-        # Running as PyInstaller exe
-        target = f'"{sys.executable}" --force'
+        # Running as PyInstaller exe; gui.py runs the command line when given arguments
+        target = f'"{sys.executable}" --force --progress'
     else:
         # Running as script
         python_exe = sys.executable
         script_path = Path(__file__).parent / "main.py"
-        target = f'"{python_exe}" "{script_path}" --force'
+        target = f'"{python_exe}" "{script_path}" --force --progress'
 
     # Command to create task: Weekly on Sundays at 12:00 PM
     cmd = [
@@ -0,0 +1,36 @@
+import os
+import sys
+import random
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The caches, indexes and journals live under ~/.organisr and their paths are fixed at
+# import time, so the tests get a throwaway home before any app module is imported
+_home = tempfile.mkdtemp(prefix="organisr-tests-")
+os.environ["HOME"] = os.environ["USERPROFILE"] = _home
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+NAMES = ["invoice", "report", "IMG_0001", "song", "Copy of invoice", "notes", "budget"]
+EXTENSIONS = [".pdf", ".jpg", ".mp3", ".txt", ".docx", ".xlsx"]
+
+def build_tree(root: Path, files: int = 150, seed: int = 1):
+    """Writes a reproducible tree of small files, a tenth of them duplicates of each other."""
+    rnd = random.Random(seed)
+    for i in range(files):
+        folder = root / f"d{i % 7}" / f"s{i % 3}"
+        folder.mkdir(parents=True, exist_ok=True)
+        data = b"dup" * 100 if i % 10 == 0 else rnd.randbytes(rnd.randint(10, 3000))
+        (folder / f"{rnd.choice(NAMES)}{i % 13}{rnd.choice(EXTENSIONS)}").write_bytes(data)
+
+def snapshot(root: Path) -> dict:
+    """Maps every file under root (relative path) to its contents."""
+    return {str(p.relative_to(root)): p.read_bytes() for p in sorted(root.rglob("*")) if p.is_file()}
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    import journal
+    path = tmp_path / "journal"
+    monkeypatch.setattr(journal, "JOURNAL_DIR", path)
+    return path
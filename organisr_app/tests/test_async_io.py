@@ -0,0 +1,98 @@
+import errno
+import threading
+import time
+
+import pytest
+
+import actions
+from async_io import IOLimiter, IOTimeout, LatencyShim
+from conftest import build_tree, snapshot
+from hasher import report_progress
+from journal import read_journal, journal_path
+from main import run_organizer_logic
+from reports import read_report
+
+def organise(source, dest, **options):
+    results = run_organizer_logic([source], dest, dry_run=False, use_hash_cache=False, use_dest_index=False,
+                                  report_dir=dest.parent / f"reports-{dest.name}", **options)
+    run_id = results["run_id"]
+    rows = sorted((r["source"], r["destination"].replace(str(dest), "").replace(run_id, "RUN"), r["action"])
+                  for r in read_report(results["reports"]["actions"]))
+    return results, rows, {path.replace(run_id, "RUN"): data for path, data in snapshot(dest).items()}
+
+def test_async_run_matches_serial_run(tmp_path):
+    build_tree(tmp_path / "src")
+    serial, serial_actions, serial_dest = organise(tmp_path / "src", tmp_path / "serial")
+    build_tree(tmp_path / "src")
+    with LatencyShim([tmp_path / "src"], latency=0.001, jitter=0.5):
+        limited, limited_actions, limited_dest = organise(tmp_path / "src", tmp_path / "async", async_io=True,
+                                                          io_concurrency=8, ordered_scan=True)
+    assert limited["io_timeouts"] == 0
+    assert limited_actions == serial_actions
+    assert limited_dest == serial_dest
+
+def test_stalled_call_times_out_and_is_not_retried():
+    limiter = IOLimiter(2, timeout=0.2, retries=3, backoff=0)
+    release = threading.Event()
+    try:
+        with pytest.raises(IOTimeout) as raised:
+            limiter.call("read", release.wait, 5)
+        assert raised.value.errno == errno.ETIMEDOUT
+        assert limiter.calls["read"] == 1 and limiter.timeouts["read"] == 1
+        # The stuck thread is still running until the read returns
+        release.set()
+        limiter.wait_idle("read")
+    finally:
+        limiter.close()
+
+def test_call_that_reports_progress_outlives_the_timeout():
+    limiter = IOLimiter(2, timeout=0.2)
+
+    def slow_read():
+        for _ in range(6):
+            time.sleep(0.1)
+            report_progress()
+        return "done"
+    try:
+        assert limiter.call("read", slow_read) == "done"
+        assert limiter.timeouts["read"] == 0
+    finally:
+        limiter.close()
+
+def test_transient_errors_are_retried():
+    limiter = IOLimiter(2, timeout=1, retries=2, backoff=0)
+    failures = [OSError(errno.EIO, "blip"), OSError(errno.EAGAIN, "blip")]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+    try:
+        assert limiter.call("read", flaky) == "ok"
+        assert limiter.retried["read"] == 2
+        with pytest.raises(FileNotFoundError):
+            limiter.call("read", open, "/nonexistent/file")
+        assert limiter.retried["read"] == 2
+    finally:
+        limiter.close()
+
+def test_move_that_times_out_still_lands_in_the_journal(tmp_path, monkeypatch):
+    source, dest = tmp_path / "src", tmp_path / "out"
+    build_tree(source, files=30)
+    victim = sorted(p for p in source.rglob("*") if p.is_file())[0]
+    perform_move = actions.ActionExecutor._perform_move
+
+    def hung_move(self, plan, *args):
+        if plan.source == victim:
+            time.sleep(1)
+        return perform_move(self, plan, *args)
+    monkeypatch.setattr(actions.ActionExecutor, "_perform_move", hung_move)
+
+    results, _, _ = organise(source, dest, async_io=True, io_timeout=0.3)
+    assert results["io_timeouts"] == 1
+    # The run waited for the abandoned move, which finished and was journalled
+    assert not victim.exists()
+    state = read_journal(journal_path(results["run_id"]))
+    assert state.finished
+    entry = next(e for e in state.entries if e.src == str(victim))
+    assert entry.state == "done"
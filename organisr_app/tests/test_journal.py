@@ -0,0 +1,131 @@
+import errno
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+import actions
+from actions import rename_noreplace
+from conftest import build_tree, snapshot
+from journal import latest_unfinished, read_journal, undo_run
+from main import resume_run, run_organizer_logic
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Run in a child process that dies (no cleanup, no flush) once the Nth file has been
+# renamed into place but before its 'done' record is written
+CRASHING_RUN = textwrap.dedent("""
+    import os, sys
+    from pathlib import Path
+    sys.path.insert(0, sys.argv[1])
+    import journal
+    from main import run_organizer_logic
+    journal.JOURNAL_DIR = Path(sys.argv[2])
+    done = journal.MoveJournal.done
+    calls = [0]
+    def dying(self, seq, dst):
+        calls[0] += 1
+        if calls[0] == int(sys.argv[5]):
+            os._exit(9)
+        done(self, seq, dst)
+    journal.MoveJournal.done = dying
+    run_organizer_logic([Path(sys.argv[3])], Path(sys.argv[4]), dry_run=False, use_hash_cache=False,
+                        use_dest_index=False, report_dir=Path(sys.argv[4]).parent / "crash-reports")
+""")
+
+def organise(source, dest, **options):
+    return run_organizer_logic([source], dest, dry_run=False, use_hash_cache=False, use_dest_index=False,
+                               report_dir=dest.parent / "reports", **options)
+
+def test_resume_after_crash_between_intent_and_done(tmp_path, journal_dir):
+    source, dest = tmp_path / "src", tmp_path / "out"
+    build_tree(source)
+    before = snapshot(source)
+
+    child = subprocess.run([sys.executable, "-c", CRASHING_RUN, str(APP_DIR), str(journal_dir), str(source), str(dest), "40"])
+    assert child.returncode == 9
+
+    state = latest_unfinished()
+    assert state is not None and not state.finished
+    pending = [e for e in state.entries if e.state == "pending"]
+    assert len(pending) == 1
+    # The crash came after the rename: the file is at its destination, not in the sources
+    assert Path(pending[0].dst).exists() and not Path(pending[0].src).exists()
+
+    results = resume_run(report_dir=tmp_path / "resume-reports")
+    assert results["run_id"] == state.run_id
+    assert snapshot(source) == {}
+    state = read_journal(state.path)
+    assert state.finished
+    assert all(e.state == "done" for e in state.entries)
+    assert resume_run() is None
+
+    # One undo reverts both halves of the run
+    undo = undo_run(state.run_id)
+    assert undo["unresolved"] == undo["failed"] == undo["missing"] == 0
+    assert snapshot(source) == before
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_undo_restores_files(tmp_path, pipelined):
+    source, dest = tmp_path / "src", tmp_path / "out"
+    build_tree(source)
+    before = snapshot(source)
+
+    results = organise(source, dest, pipelined=pipelined, execute_workers=3)
+    assert results["moved"] > 0 and results["trashed"] > 0
+    assert snapshot(source) == {}
+
+    undo = undo_run(results["run_id"])
+    assert undo["restored"] == results["moved"] + results["trashed"]
+    assert snapshot(source) == before
+    assert snapshot(dest) == {}
+    with pytest.raises(ValueError):
+        undo_run(results["run_id"])
+
+def test_undo_keeps_files_that_took_an_original_path(tmp_path):
+    source, dest = tmp_path / "src", tmp_path / "out"
+    build_tree(source)
+    before = snapshot(source)
+    results = organise(source, dest)
+
+    occupied = source / next(iter(before))
+    occupied.parent.mkdir(parents=True, exist_ok=True)
+    occupied.write_bytes(b"new file")
+    undo = undo_run(results["run_id"])
+    assert undo["unresolved"] == 1
+    assert occupied.read_bytes() == b"new file"
+
+    # Still undoable: once the path is free the next undo finishes the job
+    occupied.unlink()
+    undo = undo_run(results["run_id"])
+    assert undo["restored"] == 1 and undo["unresolved"] == 0
+    assert snapshot(source) == before
+
+@pytest.mark.parametrize("atomic", [True, False])
+def test_rename_noreplace_never_overwrites(tmp_path, monkeypatch, atomic):
+    if not atomic:
+        # The lexists() fallback used where renameat2 is unavailable
+        monkeypatch.setattr(actions, "_renameat2", None)
+    src, dst = tmp_path / "src.txt", tmp_path / "dst.txt"
+    src.write_text("source")
+    dst.write_text("existing")
+    with pytest.raises(FileExistsError) as raised:
+        rename_noreplace(src, dst)
+    assert raised.value.errno == errno.EEXIST
+    assert src.read_text() == "source"
+    assert dst.read_text() == "existing"
+
+    if os.name != 'nt':
+        # A dangling symlink still occupies the name
+        link = tmp_path / "link"
+        os.symlink(tmp_path / "nowhere", link)
+        with pytest.raises(FileExistsError):
+            rename_noreplace(src, link)
+        assert os.path.islink(link)
+
+    rename_noreplace(src, tmp_path / "free.txt")
+    assert (tmp_path / "free.txt").read_text() == "source"
+    assert not src.exists()
@@ -0,0 +1,44 @@
+import logging
+import re
+import shutil
+
+from conftest import build_tree, snapshot
+from main import run_organizer_logic
+from reports import read_report
+
+# Lines that legitimately differ between runs: timings, memory and queue peaks
+VOLATILE = re.compile(r"seconds|duration|peak|Reports written", re.I)
+
+def organise(tmp_path, caplog, **options):
+    source, dest = tmp_path / "src", tmp_path / "out"
+    for folder in (source, dest, tmp_path / "reports"):
+        shutil.rmtree(folder, ignore_errors=True)
+    build_tree(source)
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG):
+        results = run_organizer_logic([source], dest, dry_run=False, use_hash_cache=False, use_dest_index=False,
+                                      report_dir=tmp_path / "reports", **options)
+    # Trashed files go to a folder named after the run
+    run_id = results["run_id"]
+    actions = [(r["source"], r["destination"].replace(run_id, "RUN"), r["action"], r["ok"])
+               for r in read_report(results["reports"]["actions"])]
+    logs = [r.getMessage().replace(run_id, "RUN") for r in caplog.records if not VOLATILE.search(r.getMessage())]
+    files = {path.replace(run_id, "RUN"): data for path, data in snapshot(dest).items()}
+    return results, actions, logs, files
+
+def test_pipeline_matches_serial_run(tmp_path, caplog):
+    serial, serial_actions, serial_logs, serial_dest = organise(tmp_path, caplog)
+    piped, piped_actions, piped_logs, piped_dest = organise(tmp_path, caplog, pipelined=True,
+                                                           classify_workers=3, execute_workers=4)
+    assert serial["moved"] > 0 and serial["trashed"] > 0
+    assert piped["count"] == serial["count"]
+    assert piped_actions == serial_actions
+    assert piped_dest == serial_dest
+    assert piped_logs == serial_logs
+
+def test_ordered_parallel_scan_matches_serial_run(tmp_path, caplog):
+    _, serial_actions, serial_logs, _ = organise(tmp_path, caplog)
+    _, piped_actions, piped_logs, _ = organise(tmp_path, caplog, pipelined=True, scan_workers=4, ordered_scan=True,
+                                               execute_workers=4)
+    assert piped_actions == serial_actions
+    assert piped_logs == serial_logs
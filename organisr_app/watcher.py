@@ -0,0 +1,195 @@
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from taxonomy import IGNORED_DIRS
+
+logger = logging.getLogger(__name__)
+
+# Event flags from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+# Suffixes browsers and download managers use while a file is still being written
+PARTIAL_SUFFIXES = {'.part', '.partial', '.crdownload', '.download', '.opdownload', '.!ut', '.!qb'}
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+class Inotify:
+    """Minimal ctypes wrapper around the Linux inotify API."""
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("Watch mode requires Linux (inotify)")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise_errno()
+
+        # wd -> directory path, so event names can be turned back into full paths
+        self.watches = {}
+
+    @staticmethod
+    def _raise_errno(path: str = None):
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), path)
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise_errno(path)
+        self.watches[wd] = path
+        return wd
+
+    def read_events(self, timeout: float) -> list[tuple[Optional[str], str, int]]:
+        """Waits up to `timeout` seconds and returns (directory, name, mask) tuples."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_IGNORED:
+                # Watch removed by the kernel (directory deleted or unmounted)
+                self.watches.pop(wd, None)
+                continue
+            events.append((self.watches.get(wd), name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class WatchDaemon:
+    """
+    Watches source directories and hands settled files to `on_batch` in small batches.
+    A file is settled once no event has touched it for `settle_seconds`; partial
+    downloads are ignored until they are renamed to their final name.
+    """
+    def __init__(self, source_dirs: Iterable[Path], on_batch: Callable[[list[Path]], None],
+                 exclude_dirs: Iterable[Path] = (), settle_seconds: float = 2.0, batch_size: int = 50):
+        self.source_dirs = [str(p) for p in source_dirs]
+        self.on_batch = on_batch
+        # Usually the destination: files we move in there must not be picked up again
+        self.exclude_dirs = [str(p) for p in exclude_dirs if p]
+        self.settle_seconds = settle_seconds
+        self.batch_size = max(1, batch_size)
+        # path -> monotonic time of the last event seen for it
+        self._pending = {}
+        self._inotify = None
+
+    def run(self, stop_event: threading.Event = None):
+        """Blocks until stop_event is set (or KeyboardInterrupt)."""
+        self._inotify = Inotify()
+        try:
+            for src in self.source_dirs:
+                if os.path.isdir(src):
+                    self._watch_tree(src, queue_files=False)
+            logger.info(f"Watching {len(self._inotify.watches)} folders for new files...")
+
+            while stop_event is None or not stop_event.is_set():
+                for dirpath, name, mask in self._inotify.read_events(timeout=min(self.settle_seconds, 0.5)):
+                    self._handle_event(dirpath, name, mask)
+                self._flush_settled()
+        except KeyboardInterrupt:
+            logger.info("Watch mode stopped.")
+        finally:
+            self._inotify.close()
+
+    def _is_excluded(self, path: str) -> bool:
+        return any(path == d or path.startswith(d + os.sep) for d in self.exclude_dirs)
+
+    @staticmethod
+    def _is_partial(name: str) -> bool:
+        return os.path.splitext(name)[1].lower() in PARTIAL_SUFFIXES
+
+    def _watch_tree(self, root: str, queue_files: bool):
+        """Adds watches for a directory and its subdirectories; optionally queues files already inside."""
+        for dirpath, dirnames, filenames in os.walk(root):
+            if self._is_excluded(dirpath):
+                dirnames[:] = []
+                continue
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith('.')]
+            try:
+                self._inotify.add_watch(dirpath)
+            except OSError as e:
+                # ENOSPC here means fs.inotify.max_user_watches is too low
+                logger.warning(f"Cannot watch {dirpath}: {e}")
+                continue
+            if queue_files:
+                now = time.monotonic()
+                for f in filenames:
+                    if not self._is_partial(f):
+                        self._pending[os.path.join(dirpath, f)] = now
+
+    def _handle_event(self, dirpath: Optional[str], name: str, mask: int):
+        if mask & IN_Q_OVERFLOW:
+            logger.warning("inotify queue overflowed; some new files may only be organised on the next full run.")
+            return
+        if dirpath is None or not name:
+            return
+
+        path = os.path.join(dirpath, name)
+        if self._is_excluded(path):
+            return
+
+        if mask & IN_ISDIR:
+            # A folder created or moved in: watch it and pick up anything already inside
+            if mask & (IN_CREATE | IN_MOVED_TO) and name not in IGNORED_DIRS and not name.startswith('.'):
+                self._watch_tree(path, queue_files=True)
+            return
+
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self._pending.pop(path, None)
+            return
+
+        if self._is_partial(name):
+            return
+
+        # Every write pushes the deadline back, which debounces bursts
+        self._pending[path] = time.monotonic()
+
+    def _flush_settled(self):
+        now = time.monotonic()
+        settled = [p for p, seen in self._pending.items() if now - seen >= self.settle_seconds]
+        if not settled:
+            return
+
+        for p in settled:
+            del self._pending[p]
+
+        for i in range(0, len(settled), self.batch_size):
+            batch = [Path(p) for p in settled[i:i + self.batch_size]]
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                # Keep the daemon alive; the files are left in place for the next run
+                logger.error(f"Failed to organise batch: {e}")